@@ -110,6 +110,9 @@ logger = logging.getLogger(__name__)
 # Initialize timezone helper
 tz_helper = TimezoneHelper()
 
+# Resolved once at import instead of on every request
+CENTRAL_TZ = pytz.timezone('America/Chicago')
+
 ACTION_TO_DEPARTMENT_MAP = {
     'In Production': 'Heat Press',
     'Picking': 'Picking',
@@ -148,13 +151,11 @@ DB_CONFIG = {
 
 def get_central_date():
     """Get current date in Central Time"""
-    central = pytz.timezone('America/Chicago')
-    return datetime.now(central).date()
+    return datetime.now(CENTRAL_TZ).date()
 
 def get_central_datetime():
     """Get current datetime in Central Time"""
-    central = pytz.timezone('America/Chicago')
-    return datetime.now(central)
+    return datetime.now(CENTRAL_TZ)
 
 # Database connection function
 def get_db_connection():
@@ -778,8 +779,7 @@ def get_today_clock_times():
 def get_server_time():
     """Get current server time in various timezones"""
     utc_now = datetime.utcnow()
-    central = pytz.timezone('America/Chicago')
-    central_now = utc_now.replace(tzinfo=pytz.UTC).astimezone(central)
+    central_now = utc_now.replace(tzinfo=pytz.UTC).astimezone(CENTRAL_TZ)
     
     return jsonify({
         'utc': utc_now.isoformat(),
@@ -3808,9 +3808,7 @@ def get_cost_analysis():
             end_date = request.args.get('end_date', start_date)
 
         # Use Central Time for "today" comparison (server runs in UTC)
-        import pytz
-        ct_tz = pytz.timezone('America/Chicago')
-        today_str = datetime.now(ct_tz).strftime('%Y-%m-%d')
+        today_str = datetime.now(CENTRAL_TZ).strftime('%Y-%m-%d')
         is_date_range = (start_date != end_date)
         is_past_only = (end_date < today_str)
 
@@ -6,7 +6,7 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime
 # LAZY IMPORT: EnhancedIdleDetector moved inside get_detector() for fast startup
 from api.auth import require_api_key
-from database.db_manager import DatabaseManager
+from database.db_manager import get_db
 from functools import wraps
 import json
 
@@ -40,7 +40,7 @@ def cache_response(expiration=300):
 def get_idle_threshold(employee_id):
     """Get contextual idle threshold for an employee"""
     try:
-        db_manager = DatabaseManager()
+        db_manager = get_db()
         with db_manager.get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             
@@ -53,12 +53,13 @@ def get_idle_threshold(employee_id):
                 return jsonify({'error': 'Employee not found'}), 404
             
             role = result['role']
-        
-        threshold = get_detector().get_contextual_threshold(
-            employee_id, 
-            role, 
-            datetime.now()
-        )
+            
+            threshold = get_detector().get_contextual_threshold(
+                employee_id, 
+                role, 
+                datetime.now(),
+                cursor
+            )
         
         return jsonify({
             'employee_id': employee_id,
@@ -76,15 +77,21 @@ def get_idle_threshold(employee_id):
 def get_idle_probability(employee_id):
     """Get ML-predicted idle probability"""
     try:
-        probability = get_detector().predict_idle_probability(
-            employee_id,
-            datetime.now()
-        )
-        
-        features = get_detector().get_employee_features(
-            employee_id,
-            datetime.now()
-        )[0]
+        # One pooled connection for both lookups
+        with get_db().get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            
+            probability = get_detector().predict_idle_probability(
+                employee_id,
+                datetime.now(),
+                cursor
+            )
+            
+            features = get_detector().get_employee_features(
+                employee_id,
+                datetime.now(),
+                cursor
+            )[0]
         
         return jsonify({
             'employee_id': employee_id,
@@ -4,27 +4,141 @@ Enhanced Idle Detection System with ML
 
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from mysql.connector.errors import PoolError
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
-from database.db_manager import DatabaseManager
+import random
+import time
+from database.db_manager import DatabaseManager, get_db
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Expected path length of an unsuccessful BST search over n samples"""
+    n = np.asarray(n_samples, dtype=float)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+def _pack_forest(model: IsolationForest) -> Optional[Dict]:
+    """Flatten a fitted IsolationForest into padded (n_trees, n_nodes) arrays
+    
+    Leaves point at themselves so every row can descend max_depth levels in
+    lock-step. Each leaf stores depth + c(n_node_samples) - 1 with the root at
+    depth 1 (sklearn counts nodes on the path, as tree_.compute_node_depths
+    does), the per-tree path length IsolationForest.score_samples sums. Returns None when the forest
+    subsamples features (not the default) or the packed scores disagree with
+    model.decision_function, so callers fall back to sklearn.
+    """
+    if not hasattr(model, 'estimators_') or model.max_features != 1.0:
+        return None
+    
+    trees = [est.tree_ for est in model.estimators_]
+    n_trees = len(trees)
+    n_nodes = max(tree.node_count for tree in trees)
+    
+    feature = np.zeros((n_trees, n_nodes), dtype=np.intp)
+    threshold = np.full((n_trees, n_nodes), np.inf)
+    left = np.zeros((n_trees, n_nodes), dtype=np.intp)
+    right = np.zeros((n_trees, n_nodes), dtype=np.intp)
+    path_length = np.zeros((n_trees, n_nodes))
+    max_depth = 0
+    
+    for t, tree in enumerate(trees):
+        count = tree.node_count
+        nodes = np.arange(count)
+        is_leaf = tree.children_left == -1
+        
+        # Node ids are in depth-first order, so parents come before children;
+        # the root counts as 1 because sklearn counts nodes, not edges
+        depth = np.ones(count, dtype=np.intp)
+        for node in nodes[~is_leaf]:
+            depth[tree.children_left[node]] = depth[node] + 1
+            depth[tree.children_right[node]] = depth[node] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        
+        feature[t, :count] = np.where(is_leaf, 0, tree.feature)
+        threshold[t, :count] = np.where(is_leaf, np.inf, tree.threshold)
+        left[t, :count] = np.where(is_leaf, nodes, tree.children_left)
+        right[t, :count] = np.where(is_leaf, nodes, tree.children_right)
+        path_length[t, :count] = np.where(
+            is_leaf, depth + _average_path_length(tree.n_node_samples) - 1.0, 0.0
+        )
+    
+    forest = {
+        'feature': feature,
+        'threshold': threshold,
+        'left': left,
+        'right': right,
+        'path_length': path_length,
+        'max_depth': max_depth,
+        'denominator': n_trees * _average_path_length([model.max_samples_])[0],
+        'offset': model.offset_
+    }
+    
+    # Parity check against sklearn on random scaled input
+    probe = np.random.default_rng(0).normal(scale=3.0, size=(256, model.n_features_in_))
+    if not np.allclose(_forest_decision_function(forest, probe), model.decision_function(probe)):
+        logger.warning("Packed forest disagrees with IsolationForest; using sklearn scoring")
+        return None
+    return forest
+
+def _forest_decision_function(forest: Dict, X_scaled: np.ndarray) -> np.ndarray:
+    """IsolationForest.decision_function over a forest packed by _pack_forest()"""
+    # sklearn trees compare float32 inputs against float64 thresholds
+    X32 = np.asarray(X_scaled, dtype=np.float32)
+    rows = np.arange(X32.shape[0])[:, None]
+    trees = np.arange(forest['feature'].shape[0])[None, :]
+    node = np.zeros((X32.shape[0], trees.shape[1]), dtype=np.intp)
+    
+    for _ in range(forest['max_depth']):
+        go_left = X32[rows, forest['feature'][trees, node]] <= forest['threshold'][trees, node]
+        node = np.where(go_left, forest['left'][trees, node], forest['right'][trees, node])
+    
+    depths = forest['path_length'][trees, node].sum(axis=1)
+    return -(2.0 ** (-depths / forest['denominator'])) - forest['offset']
+
 class EnhancedIdleDetector:
     """Advanced idle detection with ML and pattern recognition"""
     
+    # Seconds a memoized recent-break check stays valid
+    RECENT_BREAK_TTL = 60
+    
+    # Seconds memoized get_employee_features() results stay valid
+    FEATURE_CACHE_TTL = 60
+    
+    # Concurrent per-employee sample collectors in train_model. They draw from a
+    # dedicated pool of this size, never from the shared get_db() pool the API uses
+    TRAIN_WORKERS = 4
+    
+    # Attempts per employee when the training pool is momentarily exhausted
+    TRAIN_POOL_RETRIES = 3
+    
     def __init__(self):
-        self.db_manager = DatabaseManager()
+        # Shared process-wide pool rather than a new pool per detector
+        self.db_manager = get_db()
         self.model_path = "models/idle_detector_model.pkl"
         self.scaler_path = "models/idle_scaler.pkl"
+        self.scaler_stats_path = "models/idle_scaler.npz"
         self.model = None
         self.scaler = None
         
+        # Fitted StandardScaler statistics; scaling is (X - mean) / scale
+        self._scaler_mean = None
+        self._scaler_scale = None
+        
+        # Packed tree arrays from _pack_forest(), rebuilt whenever the model changes
+        self._forest = None
+        
         # Role-specific idle thresholds (in minutes)
         self.role_thresholds = {
             'Picker': 15,
@@ -35,6 +149,10 @@ class EnhancedIdleDetector:
             'Packing and Shipping': 20
         }
         
+        # Same thresholds as an array for batch lookups; the extra last slot is the default
+        self._role_index = {role: i for i, role in enumerate(self.role_thresholds)}
+        self._role_base = np.array(list(self.role_thresholds.values()) + [20], dtype=float)
+        
         # Context-aware adjustments
         self.context_modifiers = {
             'shift_start': 1.5,
@@ -44,6 +162,18 @@ class EnhancedIdleDetector:
             'low_productivity': 0.9
         }
         
+        # role_name -> expected items per 10-minute window (loaded on first use)
+        self._role_expected = None
+        
+        # (employee_id, minute) -> recent break flag, cleared every RECENT_BREAK_TTL seconds
+        self._recent_break_cache = {}
+        self._recent_break_cache_at = time.monotonic()
+        
+        # (employee_id, minute) -> feature row, cleared every FEATURE_CACHE_TTL seconds
+        # or explicitly via clear_feature_cache() at the start of a scheduler pass
+        self._feature_cache = {}
+        self._feature_cache_at = time.monotonic()
+        
         self._load_or_create_model()
     
     def _load_or_create_model(self):
@@ -53,6 +183,8 @@ class EnhancedIdleDetector:
         if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
             self.model = joblib.load(self.model_path)
             self.scaler = joblib.load(self.scaler_path)
+            self._load_scaler_stats()
+            self._forest = _pack_forest(self.model)
             logger.info("Loaded existing idle detection model")
         else:
             self.model = IsolationForest(
@@ -63,87 +195,202 @@ class EnhancedIdleDetector:
             self.scaler = StandardScaler()
             logger.info("Created new idle detection model")
     
-    def get_employee_features(self, employee_id: int, check_time: datetime) -> np.ndarray:
-        """Extract features for idle prediction"""
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            features = []
-            
-            # 1. Time since last activity
-            cursor.execute("""
-                SELECT TIMESTAMPDIFF(MINUTE, MAX(created_at), %s) as minutes_since_activity
-                FROM activity_logs
-                WHERE employee_id = %s
-                AND created_at <= %s
-            """, (check_time, employee_id, check_time))
-            
-            result = cursor.fetchone()
-            minutes_since = result['minutes_since_activity'] or 0
-            features.append(minutes_since)
-            
-            # 2. Average activity frequency (last hour)
-            cursor.execute("""
-                SELECT COUNT(*) as activity_count
-                FROM activity_logs
-                WHERE employee_id = %s
-                AND created_at BETWEEN %s AND %s
-            """, (
-                employee_id,
-                check_time - timedelta(hours=1),
-                check_time
-            ))
-            
-            result = cursor.fetchone()
-            features.append(result['activity_count'])
-            
-            # 3. Time of day (normalized to 0-1)
-            features.append(check_time.hour / 24.0)
-            
-            # 4. Day of week (0=Monday, 6=Sunday)
-            features.append(check_time.weekday() / 7.0)
-            
-            # 5. Productivity in last hour
-            cursor.execute("""
-                SELECT COALESCE(SUM(points_earned), 0) as recent_points
-                FROM activity_logs
-                WHERE employee_id = %s
-                AND created_at BETWEEN %s AND %s
-            """, (
-                employee_id,
-                check_time - timedelta(hours=1),
-                check_time
-            ))
-            
-            result = cursor.fetchone()
-            features.append(result['recent_points'])
-            
-            # 6. Historical idle frequency (last 7 days)
-            cursor.execute("""
-                SELECT COUNT(*) as idle_count
-                FROM idle_periods
-                WHERE employee_id = %s
-                AND start_time >= %s
-            """, (
-                employee_id,
-                check_time - timedelta(days=7)
-            ))
-            
-            result = cursor.fetchone()
-            features.append(result['idle_count'])
+    def _load_scaler_stats(self):
+        """Load scaler mean/scale from the .npz sidecar, or from the pickled scaler"""
+        if os.path.exists(self.scaler_stats_path):
+            with np.load(self.scaler_stats_path) as stats:
+                self._scaler_mean = stats['mean']
+                self._scaler_scale = stats['scale']
+        elif hasattr(self.scaler, 'mean_'):
+            self._scaler_mean = self.scaler.mean_
+            self._scaler_scale = self.scaler.scale_
+    
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        """Apply the fitted StandardScaler statistics to a feature matrix"""
+        return (X - self._scaler_mean) / self._scaler_scale
+    
+    def _decision_function(self, X_scaled: np.ndarray) -> np.ndarray:
+        """IsolationForest.decision_function over the packed forest
+        
+        Descends all trees for all rows at once with numpy fancy indexing
+        instead of one sklearn apply() call per tree.
+        """
+        if self._forest is None:
+            return self.model.decision_function(X_scaled)
+        return _forest_decision_function(self._forest, X_scaled)
+    
+    def get_employee_features(self, employee_id: int, check_time: datetime,
+                              cursor=None) -> np.ndarray:
+        """Extract features for idle prediction
+        
+        Pass a dictionary cursor to reuse the caller's connection across many calls.
+        Results are memoized per (employee_id, minute), so predict_idle_probability()
+        and a follow-up feature lookup in the same tick share one query.
+        """
+        now = time.monotonic()
+        if now - self._feature_cache_at > self.FEATURE_CACHE_TTL:
+            self.clear_feature_cache()
+        
+        key = (employee_id, check_time.replace(second=0, microsecond=0))
+        cached = self._feature_cache.get(key)
+        if cached is not None:
+            return cached.copy()
+        
+        if cursor is None:
+            with self.db_manager.get_connection() as conn:
+                return self.get_employee_features(employee_id, check_time, conn.cursor(dictionary=True))
+        
+        # All database-backed features in one round-trip
+        cursor.execute("""
+            SELECT
+                (SELECT TIMESTAMPDIFF(MINUTE, MAX(created_at), %(ct)s)
+                 FROM activity_logs
+                 WHERE employee_id = %(eid)s
+                 AND created_at <= %(ct)s) as minutes_since_activity,
+                (SELECT COUNT(*)
+                 FROM activity_logs
+                 WHERE employee_id = %(eid)s
+                 AND created_at BETWEEN %(hour_ago)s AND %(ct)s) as activity_count,
+                (SELECT COALESCE(SUM(points_earned), 0)
+                 FROM activity_logs
+                 WHERE employee_id = %(eid)s
+                 AND created_at BETWEEN %(hour_ago)s AND %(ct)s) as recent_points,
+                (SELECT COUNT(*)
+                 FROM idle_periods
+                 WHERE employee_id = %(eid)s
+                 AND start_time >= %(week_ago)s) as idle_count,
+                (SELECT efficiency_rate * 100
+                 FROM daily_scores
+                 WHERE employee_id = %(eid)s
+                 AND score_date = %(day)s
+                 LIMIT 1) as efficiency_percent,
+                (SELECT COUNT(*)
+                 FROM break_entries
+                 WHERE employee_id = %(eid)s
+                 AND end_time BETWEEN %(half_hour_ago)s AND %(ct)s) as recent_break
+        """, {
+            'eid': employee_id,
+            'ct': check_time,
+            'hour_ago': check_time - timedelta(hours=1),
+            'week_ago': check_time - timedelta(days=7),
+            'half_hour_ago': check_time - timedelta(minutes=30),
+            'day': check_time.date()
+        })
+        
+        result = cursor.fetchone()
+        efficiency = result['efficiency_percent']
+        
+        features = [
+            result['minutes_since_activity'] or 0,   # 1. Time since last activity
+            result['activity_count'],                # 2. Activity frequency (last hour)
+            check_time.hour / 24.0,                  # 3. Time of day (normalized to 0-1)
+            check_time.weekday() / 7.0,              # 4. Day of week (0=Monday, 6=Sunday)
+            result['recent_points'],                 # 5. Productivity in last hour
+            result['idle_count'],                    # 6. Historical idle frequency (last 7 days)
+            efficiency if efficiency is not None else 50.0,  # 7. Current efficiency
+            1 if result['recent_break'] > 0 else 0   # 8. Break status
+        ]
+        
+        features = np.array(features, dtype=float).reshape(1, -1)
+        self._feature_cache[key] = features
+        return features.copy()
+    
+    def clear_feature_cache(self):
+        """Drop memoized feature rows (call at the start of each scheduler pass)"""
+        self._feature_cache.clear()
+        self._feature_cache_at = time.monotonic()
+    
+    def _features_many(self, cursor, samples: List[Tuple[int, datetime]],
+                       dtype=np.float64) -> np.ndarray:
+        """Extract features for many (employee_id, check_time) samples at once
+        
+        Samples go into a session temp table and all feature sources are read
+        with a single query over it, filling a preallocated (n, 8) array
+        of dtype in place. Columns match get_employee_features().
+        """
+        X = np.zeros((len(samples), 8), dtype=dtype)
+        if not samples:
+            return X
+        
+        cursor.execute("""
+            CREATE TEMPORARY TABLE idle_sample_points (
+                idx INT PRIMARY KEY,
+                employee_id INT NOT NULL,
+                check_time DATETIME NOT NULL
+            )
+        """)
+        try:
+            cursor.executemany(
+                "INSERT INTO idle_sample_points (idx, employee_id, check_time) VALUES (%s, %s, %s)",
+                [(i, employee_id, check_time) for i, (employee_id, check_time) in enumerate(samples)]
+            )
             
-            # 7. Current efficiency
+            # Every database-backed feature for every sample in one query
             cursor.execute("""
-                SELECT efficiency_rate * 100 as efficiency_percent
-                FROM daily_scores
-                WHERE employee_id = %s
-                AND score_date = %s
-            """, (employee_id, check_time.date()))
-            
-            result = cursor.fetchone()
-            features.append(result['efficiency_percent'] if result else 50.0)
-            
-            # 8. Break status
+                SELECT 
+                    s.idx,
+                    (SELECT TIMESTAMPDIFF(MINUTE, MAX(a.created_at), s.check_time)
+                     FROM activity_logs a
+                     WHERE a.employee_id = s.employee_id
+                     AND a.created_at <= s.check_time) as minutes_since_activity,
+                    COUNT(h.id) as activity_count,
+                    COALESCE(SUM(h.points_earned), 0) as recent_points,
+                    (SELECT COUNT(*)
+                     FROM idle_periods ip
+                     WHERE ip.employee_id = s.employee_id
+                     AND ip.start_time >= s.check_time - INTERVAL 7 DAY) as idle_count,
+                    (SELECT ds.efficiency_rate * 100
+                     FROM daily_scores ds
+                     WHERE ds.employee_id = s.employee_id
+                     AND ds.score_date = DATE(s.check_time)
+                     LIMIT 1) as efficiency_percent,
+                    EXISTS(SELECT 1
+                           FROM break_entries b
+                           WHERE b.employee_id = s.employee_id
+                           AND b.end_time BETWEEN s.check_time - INTERVAL 30 MINUTE AND s.check_time) as recent_break
+                FROM idle_sample_points s
+                LEFT JOIN activity_logs h
+                    ON h.employee_id = s.employee_id
+                    AND h.created_at BETWEEN s.check_time - INTERVAL 1 HOUR AND s.check_time
+                GROUP BY s.idx, s.employee_id, s.check_time
+            """)
+            for row in cursor.fetchall():
+                i = row['idx']
+                efficiency = row['efficiency_percent']
+                X[i, 0] = row['minutes_since_activity'] or 0                   # 1. Time since last activity
+                X[i, 1] = row['activity_count']                                # 2. Activity frequency (last hour)
+                X[i, 4] = row['recent_points']                                 # 5. Productivity in last hour
+                X[i, 5] = row['idle_count']                                    # 6. Historical idle frequency (last 7 days)
+                X[i, 6] = efficiency if efficiency is not None else 50.0       # 7. Efficiency (50% when not scored yet)
+                X[i, 7] = 1 if row['recent_break'] else 0                      # 8. Break status
+        finally:
+            cursor.execute("DROP TEMPORARY TABLE idle_sample_points")
+        
+        # 3, 4. Time of day and day of week need no database access
+        for i, (_, check_time) in enumerate(samples):
+            X[i, 2] = check_time.hour / 24.0
+            X[i, 3] = check_time.weekday() / 7.0
+        
+        return X
+    
+    def _load_role_expectations(self, cursor) -> Dict[str, float]:
+        """Expected items per window for every role (role_configs is static)"""
+        cursor.execute("""
+            SELECT role_name, expected_per_hour / 6 as expected_per_window
+            FROM role_configs
+        """)
+        return {row['role_name']: row['expected_per_window'] for row in cursor.fetchall()}
+    
+    def _has_recent_break(self, cursor, employee_id: int, check_time: datetime) -> bool:
+        """Whether a break ended in the 30 minutes before check_time (memoized per minute)"""
+        now = time.monotonic()
+        if now - self._recent_break_cache_at > self.RECENT_BREAK_TTL:
+            self._recent_break_cache.clear()
+            self._recent_break_cache_at = now
+        
+        key = (employee_id, check_time.replace(second=0, microsecond=0))
+        recent = self._recent_break_cache.get(key)
+        if recent is None:
             cursor.execute("""
                 SELECT COUNT(*) as recent_break
                 FROM break_entries
@@ -154,84 +401,154 @@ class EnhancedIdleDetector:
                 check_time - timedelta(minutes=30),
                 check_time
             ))
-            
-            result = cursor.fetchone()
-            features.append(1 if result['recent_break'] > 0 else 0)
-            
-        return np.array(features).reshape(1, -1)
+            recent = cursor.fetchone()['recent_break'] > 0
+            self._recent_break_cache[key] = recent
+        return recent
     
     def get_contextual_threshold(self, employee_id: int, role: str, 
-                                 check_time: datetime) -> int:
-        """Get dynamic idle threshold based on context"""
+                                 check_time: datetime, cursor=None) -> int:
+        """Get dynamic idle threshold based on context
+        
+        Pass a dictionary cursor to reuse the caller's connection across many calls.
+        """
+        if cursor is None:
+            with self.db_manager.get_connection() as conn:
+                return self.get_contextual_threshold(
+                    employee_id, role, check_time, conn.cursor(dictionary=True)
+                )
+        
         base_threshold = self.role_thresholds.get(role, 20)
         modifier = 1.0
         
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Check if near shift start/end
-            shift_hour = check_time.hour
-            if 7 <= shift_hour <= 8:
-                modifier *= self.context_modifiers['shift_start']
-            elif 15 <= shift_hour <= 16:
-                modifier *= self.context_modifiers['shift_end']
-            
-            # Check if recently returned from break
-            cursor.execute("""
-                SELECT COUNT(*) as recent_break
-                FROM break_entries
-                WHERE employee_id = %s
-                AND end_time BETWEEN %s AND %s
-            """, (
-                employee_id,
-                check_time - timedelta(minutes=30),
-                check_time
-            ))
-            
-            if cursor.fetchone()['recent_break'] > 0:
-                modifier *= self.context_modifiers['after_break']
+        # Check if near shift start/end
+        shift_hour = check_time.hour
+        if 7 <= shift_hour <= 8:
+            modifier *= self.context_modifiers['shift_start']
+        elif 15 <= shift_hour <= 16:
+            modifier *= self.context_modifiers['shift_end']
+        
+        # Check if recently returned from break
+        if self._has_recent_break(cursor, employee_id, check_time):
+            modifier *= self.context_modifiers['after_break']
+        
+        # Check recent productivity
+        cursor.execute("""
+            SELECT AVG(a.items_count) as avg_items
+            FROM activity_logs a
+            WHERE a.employee_id = %s
+            AND a.created_at >= %s
+        """, (
+            employee_id,
+            check_time - timedelta(hours=2)
+        ))
+        
+        result = cursor.fetchone()
+        if result and result['avg_items']:
+            # Get expected performance
+            if self._role_expected is None:
+                self._role_expected = self._load_role_expectations(cursor)
+            
+            expected = self._role_expected.get(role)
+            if expected is not None and result['avg_items'] > expected * 1.2:
+                modifier *= self.context_modifiers['high_productivity']
+            elif expected is not None and result['avg_items'] < expected * 0.8:
+                modifier *= self.context_modifiers['low_productivity']
+        
+        return int(base_threshold * modifier)
+    
+    def get_contextual_thresholds_batch(self, samples: List[Tuple[int, str, datetime]],
+                                        cursor=None) -> Dict[int, int]:
+        """Contextual idle thresholds for many (employee_id, role, check_time) samples
+        
+        Break and productivity context is read in one query over a temp table and
+        the modifiers are applied as array operations. Matches
+        get_contextual_threshold() per sample. Returns {employee_id: threshold}.
+        """
+        if not samples:
+            return {}
+        
+        if cursor is None:
+            with self.db_manager.get_connection() as conn:
+                return self.get_contextual_thresholds_batch(samples, conn.cursor(dictionary=True))
+        
+        n = len(samples)
+        recent_break = np.zeros(n, dtype=bool)
+        avg_items = np.full(n, np.nan)
+        
+        cursor.execute("""
+            CREATE TEMPORARY TABLE idle_threshold_points (
+                idx INT PRIMARY KEY,
+                employee_id INT NOT NULL,
+                check_time DATETIME NOT NULL
+            )
+        """)
+        try:
+            cursor.executemany(
+                "INSERT INTO idle_threshold_points (idx, employee_id, check_time) VALUES (%s, %s, %s)",
+                [(i, employee_id, check_time) for i, (employee_id, _, check_time) in enumerate(samples)]
+            )
             
-            # Check recent productivity
             cursor.execute("""
-                SELECT AVG(a.items_count) as avg_items
-                FROM activity_logs a
-                WHERE a.employee_id = %s
-                AND a.created_at >= %s
-            """, (
-                employee_id,
-                check_time - timedelta(hours=2)
-            ))
-            
-            result = cursor.fetchone()
-            if result and result['avg_items']:
-                # Get expected performance
-                cursor.execute("""
-                    SELECT expected_per_hour / 6 as expected_per_window
-                    FROM role_configs
-                    WHERE role_name = %s
-                """, (role,))
-                
-                expected = cursor.fetchone()
-                if expected and result['avg_items'] > expected['expected_per_window'] * 1.2:
-                    modifier *= self.context_modifiers['high_productivity']
-                elif expected and result['avg_items'] < expected['expected_per_window'] * 0.8:
-                    modifier *= self.context_modifiers['low_productivity']
+                SELECT 
+                    s.idx,
+                    EXISTS(SELECT 1
+                           FROM break_entries b
+                           WHERE b.employee_id = s.employee_id
+                           AND b.end_time BETWEEN s.check_time - INTERVAL 30 MINUTE AND s.check_time) as recent_break,
+                    (SELECT AVG(a.items_count)
+                     FROM activity_logs a
+                     WHERE a.employee_id = s.employee_id
+                     AND a.created_at >= s.check_time - INTERVAL 2 HOUR) as avg_items
+                FROM idle_threshold_points s
+            """)
+            for row in cursor.fetchall():
+                recent_break[row['idx']] = bool(row['recent_break'])
+                if row['avg_items']:
+                    avg_items[row['idx']] = float(row['avg_items'])
+        finally:
+            cursor.execute("DROP TEMPORARY TABLE idle_threshold_points")
         
-        return int(base_threshold * modifier)
+        if self._role_expected is None and not np.isnan(avg_items).all():
+            self._role_expected = self._load_role_expectations(cursor)
+        role_expected = self._role_expected or {}
+        
+        default_idx = len(self._role_index)
+        base = self._role_base[[self._role_index.get(role, default_idx) for _, role, _ in samples]]
+        expected = np.array([
+            float(role_expected[role]) if role_expected.get(role) is not None else np.nan
+            for _, role, _ in samples
+        ])
+        hours = np.array([check_time.hour for _, _, check_time in samples])
+        
+        # NaN avg/expected compare False, leaving the productivity modifier at 1.0
+        modifier = np.ones(n)
+        modifier *= np.where((hours >= 7) & (hours <= 8), self.context_modifiers['shift_start'],
+                             np.where((hours >= 15) & (hours <= 16), self.context_modifiers['shift_end'], 1.0))
+        modifier *= np.where(recent_break, self.context_modifiers['after_break'], 1.0)
+        modifier *= np.where(avg_items > expected * 1.2, self.context_modifiers['high_productivity'],
+                             np.where(avg_items < expected * 0.8, self.context_modifiers['low_productivity'], 1.0))
+        
+        thresholds = (base * modifier).astype(int)
+        return {employee_id: int(t) for (employee_id, _, _), t in zip(samples, thresholds)}
     
-    def predict_idle_probability(self, employee_id: int, check_time: datetime) -> float:
-        """Predict probability of employee being idle using ML"""
-        features = self.get_employee_features(employee_id, check_time)
+    def predict_idle_probability(self, employee_id: int, check_time: datetime,
+                                 cursor=None) -> float:
+        """Predict probability of employee being idle using ML
         
-        if self.model is None:
+        cursor is passed through to get_employee_features().
+        """
+        # Untrained model/scaler: nothing to score against
+        if self.model is None or self._scaler_mean is None:
             return 0.5
         
+        features = self.get_employee_features(employee_id, check_time, cursor)
+        
         try:
-            # Scale features
-            features_scaled = self.scaler.fit_transform(features)
+            # Scale features with the statistics learned in train_model
+            features_scaled = self._scale(features)
             
             # Get anomaly score
-            prediction = self.model.decision_function(features_scaled)[0]
+            prediction = self._decision_function(features_scaled)[0]
             
             # Convert to probability (0-1 range)
             idle_probability = 1 / (1 + np.exp(prediction * 2))
@@ -240,6 +557,31 @@ class EnhancedIdleDetector:
         except:
             return 0.5
     
+    def predict_idle_probability_batch(self, samples: List[Tuple[int, datetime]]) -> Dict[int, float]:
+        """Predict idle probability for many (employee_id, check_time) pairs at once
+        
+        Features are extracted in one batch and scored with a single
+        transform/decision_function call. Returns {employee_id: probability}.
+        """
+        if not samples:
+            return {}
+        
+        if self.model is None or self._scaler_mean is None:
+            return {employee_id: 0.5 for employee_id, _ in samples}
+        
+        try:
+            with self.db_manager.get_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                X = self._features_many(cursor, samples)
+            
+            scores = self._decision_function(self._scale(X))
+            probabilities = 1 / (1 + np.exp(scores * 2))
+            
+            return {employee_id: float(p) for (employee_id, _), p in zip(samples, probabilities)}
+        except Exception as e:
+            logger.error(f"Batch idle prediction failed: {e}")
+            return {employee_id: 0.5 for employee_id, _ in samples}
+    
     def detect_idle_patterns(self, employee_id: int) -> Dict:
         """Analyze idle patterns for an employee"""
         with self.db_manager.get_connection() as conn:
@@ -253,7 +595,7 @@ class EnhancedIdleDetector:
                 'recommendations': []
             }
             
-            # Common idle times
+            # Per-hour aggregates plus the 30-day total (ROLLUP row, idle_hour NULL) in one scan
             cursor.execute("""
                 SELECT 
                     HOUR(start_time) as idle_hour,
@@ -262,29 +604,26 @@ class EnhancedIdleDetector:
                 FROM idle_periods
                 WHERE employee_id = %s
                 AND start_time >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                GROUP BY HOUR(start_time)
-                ORDER BY occurrences DESC
-                LIMIT 3
+                GROUP BY HOUR(start_time) WITH ROLLUP
             """, (employee_id,))
             
+            hourly = []
             for row in cursor.fetchall():
+                if row['idle_hour'] is None:
+                    # Average idle duration
+                    patterns['average_idle_duration'] = round(float(row['avg_duration'] or 0), 1)
+                else:
+                    hourly.append(row)
+            
+            # Common idle times (ROLLUP rules out ORDER BY ... LIMIT in SQL)
+            hourly.sort(key=lambda row: row['occurrences'], reverse=True)
+            for row in hourly[:3]:
                 patterns['common_idle_times'].append({
                     'hour': row['idle_hour'],
                     'occurrences': row['occurrences'],
                     'avg_duration': round(float(row['avg_duration']), 1)
                 })
             
-            # Average idle duration
-            cursor.execute("""
-                SELECT AVG(duration_minutes) as avg_duration
-                FROM idle_periods
-                WHERE employee_id = %s
-                AND start_time >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-            """, (employee_id,))
-            
-            result = cursor.fetchone()
-            patterns['average_idle_duration'] = round(float(result['avg_duration'] or 0), 1)
-            
             # Generate recommendations
             if patterns['common_idle_times']:
                 most_common_hour = patterns['common_idle_times'][0]['hour']
@@ -299,68 +638,109 @@ class EnhancedIdleDetector:
             
         return patterns
     
+    def _collect_employee_samples(self, cursor, employee_id: int, days_back: int) -> List[Tuple[int, datetime]]:
+        """Idle and non-idle (employee_id, timestamp) training samples for one employee"""
+        samples = []
+        
+        # Get idle periods, sampling their start times
+        cursor.execute("""
+            SELECT start_time, duration_minutes
+            FROM idle_periods
+            WHERE employee_id = %s
+            AND start_time >= DATE_SUB(NOW(), INTERVAL %s DAY)
+            LIMIT 10
+        """, (employee_id, days_back))
+        
+        for period in cursor.fetchall():
+            samples.append((employee_id, period['start_time']))
+        
+        # Also get some non-idle samples: keep each row with probability
+        # ~20/count and pick 10 in Python, instead of ORDER BY RAND()
+        # sorting the employee's whole activity window
+        cursor.execute("""
+            SELECT COUNT(*) as activity_count
+            FROM activity_logs
+            WHERE employee_id = %s
+            AND created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        """, (employee_id, days_back))
+        
+        activity_count = cursor.fetchone()['activity_count']
+        if not activity_count:
+            return samples
+        
+        cursor.execute("""
+            SELECT created_at
+            FROM activity_logs
+            WHERE employee_id = %s
+            AND created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+            AND RAND() < %s
+        """, (employee_id, days_back, min(1.0, 20.0 / activity_count)))
+        
+        activity_times = list({row['created_at'] for row in cursor.fetchall()})
+        for created_at in random.sample(activity_times, min(10, len(activity_times))):
+            samples.append((employee_id, created_at))
+        
+        return samples
+    
+    def _collect_employee_samples_pooled(self, train_db: DatabaseManager, employee_id: int,
+                                         days_back: int) -> List[Tuple[int, datetime]]:
+        """_collect_employee_samples on a connection borrowed from the training pool"""
+        for attempt in range(1, self.TRAIN_POOL_RETRIES + 1):
+            try:
+                with train_db.get_connection() as conn:
+                    cursor = conn.cursor(dictionary=True)
+                    return self._collect_employee_samples(cursor, employee_id, days_back)
+            except PoolError as e:
+                logger.warning(f"Training pool exhausted for employee {employee_id} "
+                               f"(attempt {attempt}/{self.TRAIN_POOL_RETRIES}): {e}")
+                time.sleep(0.1 * attempt)
+        logger.error(f"Skipping training samples for employee {employee_id}: no pooled connection")
+        return []
+    
     def train_model(self, days_back: int = 30):
         """Train the ML model on historical data"""
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            print(f"Training idle detection model on last {days_back} days...")
-            
-            # Get all employees
-            cursor.execute("SELECT id FROM employees WHERE is_active = TRUE")
-            employees = [row['id'] for row in cursor.fetchall()]
-            
-            # Collect training data
-            all_features = []
-            
-            for employee_id in employees:
-                # Get idle periods
-                cursor.execute("""
-                    SELECT start_time, duration_minutes
-                    FROM idle_periods
-                    WHERE employee_id = %s
-                    AND start_time >= DATE_SUB(NOW(), INTERVAL %s DAY)
-                """, (employee_id, days_back))
-                
-                idle_periods = cursor.fetchall()
-                
-                # For each idle period, get features
-                for period in idle_periods[:10]:  # Limit to 10 per employee
-                    features = self.get_employee_features(
-                        employee_id, 
-                        period['start_time']
-                    )
-                    all_features.append(features[0])
-                
-                # Also get some non-idle samples
-                cursor.execute("""
-                    SELECT DISTINCT created_at
-                    FROM activity_logs
-                    WHERE employee_id = %s
-                    AND created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-                    ORDER BY RAND()
-                    LIMIT 10
-                """, (employee_id, days_back))
-                
-                for row in cursor.fetchall():
-                    features = self.get_employee_features(
-                        employee_id,
-                        row['created_at']
-                    )
-                    all_features.append(features[0])
-            
-            if all_features:
-                # Convert to numpy array
-                X = np.array(all_features)
-                
-                # Train scaler and model
-                X_scaled = self.scaler.fit_transform(X)
-                self.model.fit(X_scaled)
-                
-                # Save model
-                joblib.dump(self.model, self.model_path)
-                joblib.dump(self.scaler, self.scaler_path)
-                
-                print(f"Model trained on {len(all_features)} samples")
-            else:
-                print("Warning: No training data available")
+        print(f"Training idle detection model on last {days_back} days...")
+        
+        # Get all employees
+        employees = [row['id'] for row in self.db_manager.execute_query(
+            "SELECT id FROM employees WHERE is_active = TRUE"
+        )]
+        
+        # Collect (employee_id, timestamp) samples concurrently from a dedicated
+        # pool sized to the worker count, so training can never exhaust the shared
+        # get_db() pool serving API requests; features are then extracted in one batch
+        train_db = DatabaseManager(pool_size=self.TRAIN_WORKERS)
+        try:
+            with ThreadPoolExecutor(max_workers=self.TRAIN_WORKERS) as executor:
+                per_employee = executor.map(
+                    lambda employee_id: self._collect_employee_samples_pooled(
+                        train_db, employee_id, days_back
+                    ),
+                    employees
+                )
+                samples = list(chain.from_iterable(per_employee))
+            
+            if samples:
+                with train_db.get_connection() as conn:
+                    cursor = conn.cursor(dictionary=True)
+                    # float32 halves the training matrix; IsolationForest works in float32 anyway
+                    X = self._features_many(cursor, samples, dtype=np.float32)
+        finally:
+            train_db.close_pool()
+        
+        if samples:
+            # Train scaler and model
+            X_scaled = self.scaler.fit_transform(X)
+            self.model.fit(X_scaled)
+            self._forest = _pack_forest(self.model)
+            
+            # Save model
+            joblib.dump(self.model, self.model_path)
+            joblib.dump(self.scaler, self.scaler_path)
+            np.savez(self.scaler_stats_path, mean=self.scaler.mean_, scale=self.scaler.scale_)
+            self._scaler_mean = self.scaler.mean_
+            self._scaler_scale = self.scaler.scale_
+            
+            print(f"Model trained on {len(samples)} samples")
+        else:
+            print("Warning: No training data available")
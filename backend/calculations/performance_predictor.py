@@ -1,8 +1,9 @@
 """Predict future performance using historical patterns"""
 from datetime import datetime, date, timedelta
+import calendar
 from typing import Dict, List, Optional, Tuple
 import logging
-import statistics
+import time
 from collections import defaultdict
 
 from database.db_manager import get_db
@@ -10,12 +11,38 @@ from utils.timezone_helpers import TimezoneHelper
 
 logger = logging.getLogger(__name__)
 
+WEEKEND_DAYS = frozenset(('Saturday', 'Sunday'))
+
 class PerformancePredictor:
     """Predict employee performance using historical data patterns"""
 
+    # Seconds a cached employee -> role_configs lookup stays valid
+    ROLE_CACHE_TTL = 300
+
     def __init__(self):
         self.db = get_db()
         self.tz_helper = TimezoneHelper()
+        # employee_id -> (fetched_at, role row or None)
+        self._role_cache = {}
+    
+    def _get_role_info(self, employee_id: int) -> Optional[Dict]:
+        """Employee's monthly_target and role_name, cached for ROLE_CACHE_TTL seconds"""
+        now = time.monotonic()
+        cached = self._role_cache.get(employee_id)
+        if cached and now - cached[0] < self.ROLE_CACHE_TTL:
+            return cached[1]
+        
+        role_info = self.db.execute_one(
+            """
+            SELECT rc.monthly_target, rc.role_name
+            FROM employees e
+            JOIN role_configs rc ON e.role_id = rc.id
+            WHERE e.id = %s
+            """,
+            (employee_id,)
+        )
+        self._role_cache[employee_id] = (now, role_info)
+        return role_info
     
     def predict_next_day_performance(self, employee_id: int) -> Dict:
         """
@@ -25,28 +52,89 @@ class PerformancePredictor:
         - Seasonal factors
         - Personal patterns
         """
+        return self.predict_next_day_performance_bulk([employee_id])[employee_id]
+    
+    def predict_next_day_performance_bulk(self, employee_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Next-day predictions for many employees with two grouped queries
+        (weekday history and recent trend), instead of two queries per employee.
+        Returns {employee_id: prediction} shaped like predict_next_day_performance().
+        """
+        if not employee_ids:
+            return {}
+        
         tomorrow = date.today() + timedelta(days=1)
-        day_name = tomorrow.strftime('%A')
+        day_name = calendar.day_name[tomorrow.weekday()]
+        ct_date = self.tz_helper.get_current_ct_date()
+        id_placeholders = ', '.join(['%s'] * len(employee_ids))
         
         # Get historical performance for this day of week
-        past_60_days = self.tz_helper.get_current_ct_date() - timedelta(days=60)
+        past_60_days = ct_date - timedelta(days=60)
+        
+        # Same-weekday dates listed explicitly (instead of DAYNAME(score_date) = ...)
+        # so the (employee_id, score_date) index serves the lookup
+        first_match = past_60_days + timedelta(days=(tomorrow.weekday() - past_60_days.weekday()) % 7)
+        weekday_dates = [first_match + timedelta(weeks=w) for w in range((tomorrow - first_match).days // 7 + 1)]
+        date_placeholders = ', '.join(['%s'] * len(weekday_dates))
 
-        historical_data = self.db.execute_query(
-            """
+        hist_rows = self.db.execute_query(
+            f"""
             SELECT
-                AVG(points_earned) as avg_points,
-                AVG(efficiency_rate) as avg_efficiency,
-                AVG(items_processed) as avg_items,
+                employee_id,
+                CAST(AVG(points_earned) AS DOUBLE) as avg_points,
+                CAST(AVG(efficiency_rate) AS DOUBLE) as avg_efficiency,
+                CAST(AVG(items_processed) AS DOUBLE) as avg_items,
+                STDDEV(points_earned) as std_dev,
                 COUNT(*) as sample_size
             FROM daily_scores
-            WHERE employee_id = %s
-            AND DAYNAME(score_date) = %s
-            AND score_date >= %s
+            WHERE employee_id IN ({id_placeholders})
+            AND score_date IN ({date_placeholders})
+            GROUP BY employee_id
             """,
-            (employee_id, day_name, past_60_days)
+            (*employee_ids, *weekday_dates)
         )
+        hist_by_employee = {row['employee_id']: row for row in hist_rows}
         
-        if not historical_data or not historical_data[0]['sample_size']:
+        # Get recent trend (last 7 days)
+        past_7_days = ct_date - timedelta(days=7)
+
+        # Average plus newer/older half averages (rn 1 = newest day), computed server-side
+        recent_rows = self.db.execute_query(
+            f"""
+            SELECT
+                employee_id,
+                COUNT(*) as sample_size,
+                CAST(AVG(points) AS DOUBLE) as recent_avg,
+                CAST(AVG(CASE WHEN rn > n DIV 2 THEN points END) AS DOUBLE) as first_half,
+                CAST(AVG(CASE WHEN rn <= n DIV 2 THEN points END) AS DOUBLE) as second_half
+            FROM (
+                SELECT
+                    employee_id,
+                    points_earned as points,
+                    ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY score_date DESC) as rn,
+                    COUNT(*) OVER (PARTITION BY employee_id) as n
+                FROM daily_scores
+                WHERE employee_id IN ({id_placeholders})
+                AND score_date >= %s
+            ) recent
+            GROUP BY employee_id
+            """,
+            (*employee_ids, past_7_days)
+        )
+        recent_by_employee = {row['employee_id']: row for row in recent_rows}
+        
+        return {
+            employee_id: self._next_day_prediction(
+                employee_id, tomorrow, day_name,
+                hist_by_employee.get(employee_id), recent_by_employee.get(employee_id)
+            )
+            for employee_id in employee_ids
+        }
+    
+    def _next_day_prediction(self, employee_id: int, tomorrow: date, day_name: str,
+                             hist_data: Optional[Dict], recent_data: Optional[Dict]) -> Dict:
+        """Combine one employee's weekday history and recent trend rows into a prediction"""
+        if not hist_data or not hist_data['sample_size']:
             return {
                 'employee_id': employee_id,
                 'prediction_date': tomorrow.isoformat(),
@@ -54,63 +142,33 @@ class PerformancePredictor:
                 'message': f'No historical data for {day_name}s'
             }
         
-        hist_data = historical_data[0]
+        recent_samples = recent_data['sample_size'] if recent_data else 0
         
-        # Get recent trend (last 7 days)
-        past_7_days = self.tz_helper.get_current_ct_date() - timedelta(days=7)
-
-        recent_data = self.db.execute_query(
-            """
-            SELECT
-                score_date,
-                points_earned,
-                efficiency_rate,
-                items_processed
-            FROM daily_scores
-            WHERE employee_id = %s
-            AND score_date >= %s
-            ORDER BY score_date DESC
-            """,
-            (employee_id, past_7_days)
-        )
-        
-        if recent_data:
-            recent_points = [float(d['points_earned']) for d in recent_data]
-            recent_avg = statistics.mean(recent_points)
+        if recent_samples:
+            recent_avg = recent_data['recent_avg']
             
             # Calculate trend factor
-            if len(recent_points) >= 3:
-                first_half = statistics.mean(recent_points[len(recent_points)//2:])
-                second_half = statistics.mean(recent_points[:len(recent_points)//2])
+            if recent_samples >= 3:
+                first_half = recent_data['first_half']
+                second_half = recent_data['second_half']
                 trend_factor = second_half / first_half if first_half > 0 else 1
             else:
                 trend_factor = 1
         else:
-            recent_avg = float(hist_data['avg_points'])
+            recent_avg = hist_data['avg_points']
             trend_factor = 1
         
         # Combine historical and recent data with weights
-        base_prediction = (float(hist_data['avg_points']) * 0.4) + (recent_avg * 0.6)
+        base_prediction = (hist_data['avg_points'] * 0.4) + (recent_avg * 0.6)
         
         # Apply trend factor
         adjusted_prediction = base_prediction * trend_factor
         
         # Get confidence level based on data availability
-        confidence = self._calculate_confidence(hist_data['sample_size'], len(recent_data))
+        confidence = self._calculate_confidence(hist_data['sample_size'], recent_samples)
         
         # Calculate range (± based on historical variance)
-        variance_data = self.db.execute_one(
-            """
-            SELECT STDDEV(points_earned) as std_dev
-            FROM daily_scores
-            WHERE employee_id = %s
-            AND DAYNAME(score_date) = %s
-            AND score_date >= %s
-            """,
-            (employee_id, day_name, past_60_days)
-        )
-        
-        std_dev = float(variance_data['std_dev'] or 0)
+        std_dev = hist_data['std_dev'] or 0.0
         
         return {
             'employee_id': employee_id,
@@ -122,11 +180,11 @@ class PerformancePredictor:
                 'low': round(max(0, adjusted_prediction - std_dev), 2),
                 'high': round(adjusted_prediction + std_dev, 2)
             },
-            'predicted_efficiency': round(float(hist_data['avg_efficiency']) * 100, 1),
-            'predicted_items': round(float(hist_data['avg_items'])),
+            'predicted_efficiency': round(hist_data['avg_efficiency'] * 100, 1),
+            'predicted_items': round(hist_data['avg_items']),
             'confidence_level': confidence,
             'factors': {
-                'historical_average': round(float(hist_data['avg_points']), 2),
+                'historical_average': round(hist_data['avg_points'], 2),
                 'recent_average': round(recent_avg, 2),
                 'trend_factor': round(trend_factor, 2),
                 'sample_size': hist_data['sample_size']
@@ -138,25 +196,45 @@ class PerformancePredictor:
         predictions = []
         weekly_total = 0
         
+        # Per-weekday history (60 days) plus the 30-day overall average and
+        # weekend count, all in one grouped query
+        ct_date = self.tz_helper.get_current_ct_date()
+        past_60_days = ct_date - timedelta(days=60)
+        past_30_days = ct_date - timedelta(days=30)
+        
+        day_rows = self.db.execute_query(
+            """
+            SELECT
+                DAYNAME(score_date) as day_name,
+                CAST(AVG(points_earned) AS DOUBLE) as avg_points,
+                COUNT(*) as sample_size,
+                CAST(SUM(CASE WHEN score_date >= %s THEN points_earned END) AS DOUBLE) as recent_points,
+                COUNT(CASE WHEN score_date >= %s THEN points_earned END) as recent_samples,
+                SUM(CASE WHEN score_date >= %s AND DAYOFWEEK(score_date) IN (1, 7)
+                    THEN 1 ELSE 0 END) as weekend_days
+            FROM daily_scores
+            WHERE employee_id = %s
+            AND score_date >= %s
+            GROUP BY DAYNAME(score_date)
+            """,
+            (past_30_days, past_30_days, past_30_days, employee_id, past_60_days)
+        )
+        
+        day_stats = {row['day_name']: row for row in day_rows}
+        recent_samples = sum(row['recent_samples'] for row in day_rows)
+        overall_avg = (
+            sum(row['recent_points'] or 0.0 for row in day_rows) / recent_samples
+            if recent_samples else 0.0
+        )
+        weekend_days = sum(int(row['weekend_days'] or 0) for row in day_rows)
+        
+        today = date.today()
         for days_ahead in range(1, 8):
-            future_date = date.today() + timedelta(days=days_ahead)
-            day_name = future_date.strftime('%A')
+            future_date = today + timedelta(days=days_ahead)
+            day_name = calendar.day_name[future_date.weekday()]
             
             # Skip weekends if employee doesn't usually work weekends
-            past_30_days = self.tz_helper.get_current_ct_date() - timedelta(days=30)
-
-            weekend_check = self.db.execute_one(
-                """
-                SELECT COUNT(*) as weekend_days
-                FROM daily_scores
-                WHERE employee_id = %s
-                AND DAYOFWEEK(score_date) IN (1, 7)
-                AND score_date >= %s
-                """,
-                (employee_id, past_30_days)
-            )
-            
-            if day_name in ['Saturday', 'Sunday'] and weekend_check['weekend_days'] == 0:
+            if day_name in WEEKEND_DAYS and weekend_days == 0:
                 predictions.append({
                     'date': future_date.isoformat(),
                     'day': day_name,
@@ -166,7 +244,7 @@ class PerformancePredictor:
                 continue
             
             # Get prediction for this day
-            day_prediction = self._predict_specific_day(employee_id, future_date, day_name)
+            day_prediction = self._predict_specific_day(day_stats.get(day_name), overall_avg)
             
             predictions.append({
                 'date': future_date.isoformat(),
@@ -179,21 +257,13 @@ class PerformancePredictor:
             weekly_total += day_prediction['points']
         
         # Get employee's role target
-        role_info = self.db.execute_one(
-            """
-            SELECT rc.monthly_target, rc.role_name
-            FROM employees e
-            JOIN role_configs rc ON e.role_id = rc.id
-            WHERE e.id = %s
-            """,
-            (employee_id,)
-        )
+        role_info = self._get_role_info(employee_id)
         
         weekly_target = float(role_info['monthly_target']) / 4 if role_info else 0
         
         return {
             'employee_id': employee_id,
-            'week_starting': (date.today() + timedelta(days=1)).isoformat(),
+            'week_starting': (today + timedelta(days=1)).isoformat(),
             'predictions': predictions,
             'predicted_weekly_total': round(weekly_total, 2),
             'weekly_target': round(weekly_target, 2),
@@ -205,29 +275,56 @@ class PerformancePredictor:
         """Identify factors that might impact future performance"""
         risk_factors = []
         
-        # 1. Declining trend
         ct_date = self.tz_helper.get_current_ct_date()
         past_7_days = ct_date - timedelta(days=7)
         past_14_days = ct_date - timedelta(days=14)
-
-        trend_data = self.db.execute_query(
+        past_7_utc_start, _ = self.tz_helper.ct_date_to_utc_range(past_7_days)
+        past_14_utc_start, _ = self.tz_helper.ct_date_to_utc_range(past_14_days)
+        month_start = ct_date.replace(day=1)
+        next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+        
+        # Every risk signal in a single round-trip
+        risk_data = self.db.execute_one(
             """
             SELECT
-                AVG(CASE WHEN score_date >= %s
-                    THEN points_earned END) as recent_avg,
-                AVG(CASE WHEN score_date < %s
-                    AND score_date >= %s
-                    THEN points_earned END) as previous_avg
-            FROM daily_scores
-            WHERE employee_id = %s
-            AND score_date >= %s
+                (SELECT CAST(AVG(points_earned) AS DOUBLE)
+                 FROM daily_scores
+                 WHERE employee_id = %(employee_id)s
+                 AND score_date >= %(past_7)s) as recent_avg,
+                (SELECT CAST(AVG(points_earned) AS DOUBLE)
+                 FROM daily_scores
+                 WHERE employee_id = %(employee_id)s
+                 AND score_date < %(past_7)s
+                 AND score_date >= %(past_14)s) as previous_avg,
+                (SELECT COUNT(*)
+                 FROM idle_periods
+                 WHERE employee_id = %(employee_id)s
+                 AND start_time >= %(past_7_utc)s) as idle_periods,
+                (SELECT COUNT(DISTINCT DATE(CONVERT_TZ(clock_in, '+00:00', 'America/Chicago')))
+                 FROM clock_times
+                 WHERE employee_id = %(employee_id)s
+                 AND clock_in >= %(past_14_utc)s) as days_worked,
+                (SELECT CAST(SUM(points_earned) AS DOUBLE)
+                 FROM daily_scores
+                 WHERE employee_id = %(employee_id)s
+                 AND score_date >= %(month_start)s
+                 AND score_date < %(next_month_start)s) as current_points
             """,
-            (past_7_days, past_7_days, past_14_days, employee_id, past_14_days)
+            {
+                'employee_id': employee_id,
+                'past_7': past_7_days,
+                'past_14': past_14_days,
+                'past_7_utc': past_7_utc_start,
+                'past_14_utc': past_14_utc_start,
+                'month_start': month_start,
+                'next_month_start': next_month_start
+            }
         )
         
-        if trend_data and trend_data[0]['recent_avg'] and trend_data[0]['previous_avg']:
-            recent = float(trend_data[0]['recent_avg'])
-            previous = float(trend_data[0]['previous_avg'])
+        # 1. Declining trend
+        if risk_data['recent_avg'] and risk_data['previous_avg']:
+            recent = risk_data['recent_avg']
+            previous = risk_data['previous_avg']
             
             if recent < previous * 0.85:  # 15% decline
                 risk_factors.append({
@@ -238,83 +335,34 @@ class PerformancePredictor:
                 })
         
         # 2. High idle time recently
-        past_7_utc_start, _ = self.tz_helper.ct_date_to_utc_range(past_7_days)
-
-        idle_data = self.db.execute_one(
-            """
-            SELECT
-                COUNT(*) as idle_periods,
-                SUM(duration_minutes) as total_idle
-            FROM idle_periods
-            WHERE employee_id = %s
-            AND start_time >= %s
-            """,
-            (employee_id, past_7_utc_start)
-        )
-        
-        if idle_data and idle_data['idle_periods'] > 10:
+        if risk_data['idle_periods'] > 10:
             risk_factors.append({
                 'type': 'high_idle_time',
                 'severity': 'medium',
-                'description': f'{idle_data["idle_periods"]} idle periods in last 7 days',
+                'description': f'{risk_data["idle_periods"]} idle periods in last 7 days',
                 'impact': 'Efficiency likely to remain low'
             })
         
         # 3. Inconsistent attendance
-        past_14_utc_start, _ = self.tz_helper.ct_date_to_utc_range(past_14_days)
-
-        attendance_data = self.db.execute_one(
-            """
-            SELECT
-                COUNT(DISTINCT DATE(CONVERT_TZ(clock_in, '+00:00', 'America/Chicago'))) as days_worked
-            FROM clock_times
-            WHERE employee_id = %s
-            AND clock_in >= %s
-            """,
-            (employee_id, past_14_utc_start)
-        )
-        
-        if attendance_data:
-            attendance_rate = attendance_data['days_worked'] / 10  # Assume 5-day work week
-            if attendance_rate < 0.8:
-                risk_factors.append({
-                    'type': 'attendance_issues',
-                    'severity': 'high',
-                    'description': f'Only worked {attendance_data["days_worked"]} days in last 2 weeks',
-                    'impact': 'May miss more days affecting monthly target'
-                })
+        attendance_rate = risk_data['days_worked'] / 10  # Assume 5-day work week
+        if attendance_rate < 0.8:
+            risk_factors.append({
+                'type': 'attendance_issues',
+                'severity': 'high',
+                'description': f'Only worked {risk_data["days_worked"]} days in last 2 weeks',
+                'impact': 'May miss more days affecting monthly target'
+            })
         
         # 4. Below target trajectory
-        month_year = ct_date.strftime('%Y-%m')
-
-        current_month = self.db.execute_one(
-            """
-            SELECT
-                SUM(points_earned) as current_points
-            FROM daily_scores
-            WHERE employee_id = %s
-            AND DATE_FORMAT(score_date, '%%Y-%%m') = %s
-            """,
-            (employee_id, month_year)
-        )
-
         days_elapsed = ct_date.day
         
-        if current_month and current_month['current_points']:
+        if risk_data['current_points']:
             # Get monthly target
-            target_data = self.db.execute_one(
-                """
-                SELECT rc.monthly_target
-                FROM employees e
-                JOIN role_configs rc ON e.role_id = rc.id
-                WHERE e.id = %s
-                """,
-                (employee_id,)
-            )
+            target_data = self._get_role_info(employee_id)
             
             if target_data:
                 expected_progress = (days_elapsed / 30) * float(target_data['monthly_target'])
-                actual_progress = float(current_month['current_points'])
+                actual_progress = risk_data['current_points']
 
                 if actual_progress < expected_progress * 0.8:
                     risk_factors.append({
@@ -326,44 +374,20 @@ class PerformancePredictor:
         
         return risk_factors
     
-    def _predict_specific_day(self, employee_id: int, target_date: date, day_name: str) -> Dict:
-        """Helper to predict performance for a specific day"""
-        # Get historical average for this day of week
-        past_60_days = self.tz_helper.get_current_ct_date() - timedelta(days=60)
-
-        hist_data = self.db.execute_one(
-            """
-            SELECT
-                AVG(points_earned) as avg_points,
-                COUNT(*) as sample_size
-            FROM daily_scores
-            WHERE employee_id = %s
-            AND DAYNAME(score_date) = %s
-            AND score_date >= %s
-            """,
-            (employee_id, day_name, past_60_days)
-        )
-
+    def _predict_specific_day(self, hist_data: Optional[Dict], overall_avg: float) -> Dict:
+        """Helper to predict performance for a specific day
+        
+        hist_data is that weekday's row from predict_week_performance's grouped
+        query (None when the employee has no history for it).
+        """
         if not hist_data or not hist_data['sample_size']:
             # No data for this day, use overall average
-            past_30_days = self.tz_helper.get_current_ct_date() - timedelta(days=30)
-
-            overall = self.db.execute_one(
-                """
-                SELECT AVG(points_earned) as avg_points
-                FROM daily_scores
-                WHERE employee_id = %s
-                AND score_date >= %s
-                """,
-                (employee_id, past_30_days)
-            )
-            
             return {
-                'points': float(overall['avg_points'] or 0),
+                'points': overall_avg,
                 'confidence': 'low'
             }
         
-        points = float(hist_data['avg_points'])
+        points = hist_data['avg_points']
         confidence = 'high' if hist_data['sample_size'] >= 4 else 'medium' if hist_data['sample_size'] >= 2 else 'low'
         
         return {
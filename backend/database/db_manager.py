@@ -122,6 +122,8 @@ class DatabaseManager:
         if self._pool:
             # Close all connections
             logger.info("Closing database connection pool")
+            self._pool._remove_connections()
+            self._pool = None
     
     # Compatibility methods for existing code
     def fetch_one(self, query: str, params: tuple = None) -> Optional[Dict[str, Any]]:
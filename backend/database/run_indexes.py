@@ -22,6 +22,9 @@ def run_indexes():
         ("idx_connecteam_shifts_employee", "connecteam_shifts", "employee_id, shift_date"),
         ("idx_connecteam_shifts_date", "connecteam_shifts", "shift_date"),
         ("idx_idle_periods_employee", "idle_periods", "employee_id, start_time"),
+        # Idle detector: (employee_id, created_at) ranges; trailing columns make it covering
+        ("idx_activity_logs_employee_created", "activity_logs", "employee_id, created_at, points_earned, items_count"),
+        ("idx_break_entries_employee_end", "break_entries", "employee_id, end_time"),
         ("idx_employees_active", "employees", "is_active"),
     ]
 
@@ -830,27 +830,46 @@ class PodFactorySync:
         print("-"*40)
         return True
 
-    def run_continuous_sync(self, interval_minutes=5):
-        """Run sync continuously at specified interval"""
-        import time
-        logger.info(f"Starting continuous sync every {interval_minutes} minutes...")
+    def run_continuous_sync(self, interval_minutes=5, min_interval=None, max_interval=None):
+        """Run sync continuously at specified interval
+        
+        When min_interval/max_interval (seconds) are given the interval adapts:
+        it doubles after a sync that wrote nothing (up to max_interval) and
+        halves after one that did (down to min_interval). Runs are scheduled on
+        time.monotonic() deadlines so sync duration doesn't add drift.
+        """
+        if min_interval is None or max_interval is None:
+            min_interval = max_interval = interval_minutes * 60
+            logger.info(f"Starting continuous sync every {interval_minutes} minutes...")
+        else:
+            logger.info(f"Starting adaptive continuous sync every {min_interval}-{max_interval} seconds...")
         logger.info("Press Ctrl+C to stop")
         
+        interval = min_interval
+        next_run = time.monotonic()
+        
         while True:
             try:
                 logger.info(f"Running sync at {self.get_central_datetime()}")
-                self.sync_activities(use_last_sync=True)
+                success_count, _ = self.sync_activities(use_last_sync=True)
+                
+                if success_count > 0:
+                    interval = max(min_interval, interval // 2)
+                else:
+                    interval = min(max_interval, interval * 2)
                 
-                logger.info(f"Sleeping for {interval_minutes} minutes...")
-                time.sleep(interval_minutes * 60)
+                next_run = max(next_run + interval, time.monotonic())
+                logger.info(f"Sleeping for {interval} seconds...")
+                time.sleep(max(0, next_run - time.monotonic()))
                 
             except KeyboardInterrupt:
                 logger.info("Continuous sync stopped by user")
                 break
             except Exception as e:
                 logger.error(f"Error in continuous sync: {e}")
-                logger.info(f"Retrying in {interval_minutes} minutes...")
-                time.sleep(interval_minutes * 60)
+                logger.info(f"Retrying in {interval} seconds...")
+                next_run = time.monotonic() + interval
+                time.sleep(interval)
 
 # Main execution
 if __name__ == "__main__":
@@ -12,6 +12,10 @@ from collections import defaultdict
 import logging
 import json
 
+# Lookup tables for predict_advanced (indexed by weekday() and day-1)
+_DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+_WEEK_BUCKET = tuple(['Week 1'] * 7 + ['Week 2'] * 7 + ['Week 3'] * 7 + ['Week 4'] * 7 + ['Week 5'] * 3)
+
 class AdvancedWarehousePredictor:
     def __init__(self):
         self.conn = mysql.connector.connect(**DB_CONFIG)
@@ -76,9 +80,9 @@ class AdvancedWarehousePredictor:
         print(f"{'Day':<12} {'Avg':>8} {'StdDev':>8} {'Min':>8} {'Max':>8} {'Mult':>8}")
         print("-" * 60)
         
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        day_rank = {name: i for i, name in enumerate(_DAY_NAMES)}
         results = cursor.fetchall()
-        sorted_results = sorted(results, key=lambda x: day_order.index(x['day']) if x['day'] in day_order else 999)
+        sorted_results = sorted(results, key=lambda x: day_rank.get(x['day'], 999))
         
         for row in sorted_results:
             multiplier = float(row['avg_orders']) / self.base_average
@@ -147,7 +151,10 @@ class AdvancedWarehousePredictor:
             print(f"  {row['month']:<12}: {row['avg_orders']:.0f} items (×{multiplier:.2f})")
         
         # 5. TREND ANALYSIS (Growth/Decline)
-        cursor.execute("""
+        # Stream rows from an unbuffered tuple cursor straight into a
+        # preallocated array (row count is known from the baseline query)
+        stream = self.conn.cursor(buffered=False)
+        stream.execute("""
             SELECT 
                 prediction_date,
                 actual_orders
@@ -157,11 +164,19 @@ class AdvancedWarehousePredictor:
             ORDER BY prediction_date
         """)
         
-        orders_timeline = cursor.fetchall()
-        if len(orders_timeline) > 30:
+        values = np.empty(int(baseline['total_days'] or 0), dtype=np.float64)
+        n_rows = 0
+        for _, actual in stream:
+            if n_rows == len(values):
+                values = np.resize(values, max(1, n_rows * 2))
+            values[n_rows] = float(actual)
+            n_rows += 1
+        stream.close()
+        values = values[:n_rows]
+        
+        if n_rows > 30:
             # Calculate trend using linear regression
-            days = np.arange(len(orders_timeline))
-            values = np.array([float(x['actual_orders']) for x in orders_timeline])
+            days = np.arange(n_rows)
             
             # Simple linear regression
             slope, intercept = np.polyfit(days, values, 1)
@@ -232,15 +247,24 @@ class AdvancedWarehousePredictor:
     def predict_advanced(self, target_date, use_all_factors=True):
         """Generate prediction using all factors"""
         
+        # Bind pattern tables to locals once; backtest calls this per day
+        patterns = self.patterns
+        _dow = patterns['day_of_week']
+        _wom = patterns['week_of_month']
+        _mon = patterns['month']
+        _tr = patterns['trends']
+        _se = patterns['special_events']
+        base = self.base_average
+        
         # Start with base
-        prediction = self.base_average
+        prediction = base
         confidence_factors = []
         adjustments = []
         
         # 1. Day of week factor (strongest signal)
-        day_name = target_date.strftime('%A')
-        if day_name in self.patterns['day_of_week']:
-            day_data = self.patterns['day_of_week'][day_name]
+        day_name = _DAY_NAMES[target_date.weekday()]
+        if day_name in _dow:
+            day_data = _dow[day_name]
             day_mult = day_data['multiplier']
             prediction *= day_mult
             confidence_factors.append(day_data['confidence'])
@@ -249,45 +273,36 @@ class AdvancedWarehousePredictor:
         if use_all_factors:
             # 2. Week of month factor
             day_of_month = target_date.day
-            if day_of_month <= 7:
-                week = 'Week 1'
-            elif day_of_month <= 14:
-                week = 'Week 2'
-            elif day_of_month <= 21:
-                week = 'Week 3'
-            elif day_of_month <= 28:
-                week = 'Week 4'
-            else:
-                week = 'Week 5'
-                
-            if week in self.patterns['week_of_month']:
-                week_mult = self.patterns['week_of_month'][week]
+            week = _WEEK_BUCKET[day_of_month - 1]
+            
+            if week in _wom:
+                week_mult = _wom[week]
                 prediction *= week_mult
                 adjustments.append(f"{week}: ×{week_mult:.2f}")
             
             # 3. Monthly seasonality
             month_num = target_date.month
-            if month_num in self.patterns['month']:
+            if month_num in _mon:
                 # Only apply if we have data for this month
-                month_mult = self.patterns['month'][month_num]['multiplier']
+                month_mult = _mon[month_num]['multiplier']
                 # Dampen the effect (use sqrt to reduce impact)
                 month_effect = 1 + (month_mult - 1) * 0.3
                 prediction *= month_effect
                 adjustments.append(f"Month: ×{month_effect:.2f}")
             
             # 4. Trend adjustment
-            if 'daily_growth' in self.patterns['trends']:
+            if 'daily_growth' in _tr:
                 # Days since training data
                 days_since = (target_date - datetime(2025, 7, 31).date()).days
                 if days_since > 0:
-                    trend_adjustment = 1 + (self.patterns['trends']['daily_growth'] * days_since / self.base_average)
+                    trend_adjustment = 1 + (_tr['daily_growth'] * days_since / base)
                     prediction *= trend_adjustment
                     adjustments.append(f"Trend: ×{trend_adjustment:.2f}")
             
             # 5. Special events
             if day_of_month <= 7 and day_name == 'Monday':
-                if 'First Monday' in self.patterns['special_events']:
-                    special_mult = self.patterns['special_events']['First Monday']
+                if 'First Monday' in _se:
+                    special_mult = _se['First Monday']
                     prediction *= special_mult
                     adjustments.append(f"First Monday: ×{special_mult:.2f}")
         
@@ -321,7 +336,7 @@ class AdvancedWarehousePredictor:
         base_prediction = self.predict_advanced(target_date)
         
         # Get historical variance for this day
-        day_name = target_date.strftime('%A')
+        day_name = _DAY_NAMES[target_date.weekday()]
         if day_name in self.patterns['day_of_week']:
             std_dev = self.patterns['day_of_week'][day_name]['std_dev']
         else:
@@ -340,7 +355,8 @@ class AdvancedWarehousePredictor:
     def backtest(self, test_start='2025-07-01', test_end='2025-07-31'):
         """Test model accuracy on historical data"""
         
-        cursor = self.conn.cursor(dictionary=True)
+        # Unbuffered: rows stream from the server while we score them
+        cursor = self.conn.cursor(dictionary=True, buffered=False)
         
         cursor.execute("""
             SELECT prediction_date, actual_orders
@@ -350,15 +366,13 @@ class AdvancedWarehousePredictor:
             ORDER BY prediction_date
         """, (test_start, test_end))
         
-        test_data = cursor.fetchall()
-        
         errors = []
         results = []
         
-        print(f"\n🧪 BACKTESTING on {len(test_data)} days:")
+        print(f"\n🧪 BACKTESTING {test_start} to {test_end}:")
         print("-" * 60)
         
-        for row in test_data:
+        for row in cursor:
             pred = self.predict_advanced(row['prediction_date'], use_all_factors=True)
             actual = row['actual_orders']
             predicted = pred['predicted_orders']
@@ -379,7 +393,7 @@ class AdvancedWarehousePredictor:
         mape = np.mean(errors)
         accuracy = 100 - mape
         
-        print(f"\n📊 BACKTEST RESULTS:")
+        print(f"\n📊 BACKTEST RESULTS ({len(results)} days):")
         print(f"  Mean Absolute Error: {mae:.0f} items")
         print(f"  Mean Absolute % Error: {mape:.1f}%")
         print(f"  Model Accuracy: {accuracy:.1f}%")
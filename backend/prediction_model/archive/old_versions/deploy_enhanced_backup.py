@@ -51,8 +51,9 @@ def deploy_enhanced_predictions():
         """)
         
         # Generate predictions for next 30 days
-        for i in range(30):
-            date = datetime.now().date() + timedelta(days=i)
+        today = datetime.now().date()
+        dates = [today + timedelta(days=i) for i in range(30)]
+        for i, date in enumerate(dates):
             result = predictor.predict_enhanced(date, verbose=False)
             
             # Prepare data for storage
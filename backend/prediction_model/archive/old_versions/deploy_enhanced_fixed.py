@@ -51,13 +51,15 @@ def deploy_enhanced_predictions():
         """)
         
         # Generate predictions for next 30 days
-        for i in range(30):
-            date = datetime.now().date() + timedelta(days=i)
+        today = datetime.now().date()
+        dates = [today + timedelta(days=i) for i in range(30)]
+        for i, date in enumerate(dates):
             result = predictor.predict_enhanced(date, verbose=False)
             
             # Prepare data for storage
             factors_json = json.dumps(result['factors'])
-            holiday_info = predictor.detect_holidays(date)
+            # predict_enhanced already ran holiday detection for this date
+            holiday_info = result.get('holiday') or predictor.detect_holidays(date)
             
             # Store in both tables
             # 1. Original predictions table (for compatibility)
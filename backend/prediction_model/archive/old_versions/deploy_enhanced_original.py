@@ -4,8 +4,7 @@ Enhanced deployment that CLEARLY shows real demand vs QC capacity
 """
 
 from enhanced_predictor import EnhancedWarehousePredictor
-from db_config import DB_CONFIG
-import mysql.connector
+from db_pool import get_connection
 from datetime import datetime, timedelta
 import json
 import logging
@@ -28,7 +27,7 @@ def deploy_enhanced_predictions():
         predictor.train_enhanced()
         
         # Database connection
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Create extended predictions table if needed
@@ -59,8 +58,9 @@ def deploy_enhanced_predictions():
         print("-" * 90)
         
         # Generate predictions for next 30 days
-        for i in range(30):
-            date = datetime.now().date() + timedelta(days=i)
+        today = datetime.now().date()
+        dates = [today + timedelta(days=i) for i in range(30)]
+        for i, date in enumerate(dates):
             result = predictor.predict_enhanced(date, verbose=False)
             
             # Get the REAL DEMAND (unconstrained)
@@ -1,20 +1,23 @@
 #!/usr/bin/env python3
-from db_config import DB_CONFIG
-import mysql.connector
+from db_pool import get_connection
 from datetime import datetime, timedelta
 import logging
 
+# Day names indexed by date.weekday()
+_DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
 class WarehousePredictor:
     def __init__(self):
         self.conn = None
         self.day_multipliers = {}
+        self.day_predictions = {}
         self.base_average = 0
         self.connect()
         
     def connect(self):
         """Establish database connection"""
         try:
-            self.conn = mysql.connector.connect(**DB_CONFIG)
+            self.conn = get_connection()
             logging.info("Database connected")
         except Exception as e:
             logging.error(f"Connection failed: {e}")
@@ -22,56 +25,54 @@ class WarehousePredictor:
     
     def train(self):
         """Train model on historical data"""
-        cursor = self.conn.cursor(dictionary=True)
+        cursor = self.conn.cursor()
         
-        # Get overall average
-        cursor.execute("""
-            SELECT AVG(actual_orders) as avg
-            FROM order_predictions
-            WHERE actual_orders IS NOT NULL
-            AND prediction_date BETWEEN '2025-01-01' AND '2025-07-31'
-        """)
-        
-        result = cursor.fetchone()
-        self.base_average = float(result['avg'])
-        
-        print(f"📊 Base daily average: {self.base_average:.0f} items")
-        
-        # Get day patterns - SIMPLIFIED WITHOUT ORDER BY
+        # Overall average, day patterns and multipliers in one round-trip; the
+        # window sums give the row-weighted overall average, same as a plain AVG
         cursor.execute("""
             SELECT 
+                WEEKDAY(prediction_date) as dow_num,
                 DAYNAME(prediction_date) as day,
                 AVG(actual_orders) as avg_orders,
-                COUNT(*) as count
+                COUNT(*) as count,
+                SUM(SUM(actual_orders)) OVER () / SUM(COUNT(*)) OVER () as overall_avg,
+                AVG(actual_orders) / (SUM(SUM(actual_orders)) OVER () / SUM(COUNT(*)) OVER ()) as multiplier
             FROM order_predictions
             WHERE actual_orders IS NOT NULL
             AND prediction_date BETWEEN '2025-01-01' AND '2025-07-31'
-            GROUP BY DAYNAME(prediction_date)
+            GROUP BY dow_num, day
+            ORDER BY dow_num
         """)
         
-        print("\n📅 Day-of-week patterns discovered:")
-        print("-" * 50)
-        
-        # Store results first
         results = cursor.fetchall()
+        if not results:
+            print("❌ No historical orders between 2025-01-01 and 2025-07-31 to train on")
+            cursor.close()
+            return False
+        self.base_average = float(results[0][4])
         
-        # Sort days in correct order in Python
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        sorted_results = sorted(results, key=lambda x: day_order.index(x['day']) if x['day'] in day_order else 999)
+        print(f"📊 Base daily average: {self.base_average:.0f} items")
+        
+        print("\n📅 Day-of-week patterns discovered:")
+        print("-" * 50)
         
-        for row in sorted_results:
-            multiplier = float(row['avg_orders']) / self.base_average
-            self.day_multipliers[row['day']] = multiplier
-            print(f"  {row['day']:10} : {row['avg_orders']:6.0f} items (×{multiplier:.2f}) [{row['count']} days]")
+        for _, day, avg_orders, count, _, multiplier in results:
+            multiplier = float(multiplier)
+            self.day_multipliers[day] = multiplier
+            # predict() only depends on the weekday, so compute it once here
+            self.day_predictions[day] = int(self.base_average * multiplier)
+            print(f"  {day:10} : {avg_orders:6.0f} items (×{multiplier:.2f}) [{count} days]")
         
         cursor.close()
         return True
     
     def predict(self, target_date):
         """Make prediction for a specific date"""
-        day_name = target_date.strftime('%A')
+        day_name = _DAY_NAMES[target_date.weekday()]
         multiplier = self.day_multipliers.get(day_name, 1.0)
-        prediction = int(self.base_average * multiplier)
+        prediction = self.day_predictions.get(day_name)
+        if prediction is None:
+            prediction = int(self.base_average * multiplier)
         
         # Calculate confidence based on how much data we have
         confidence = 75  # Base confidence
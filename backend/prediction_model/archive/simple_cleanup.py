@@ -3,31 +3,36 @@
 Simple cleanup script for prediction_model directory
 """
 
+import io
 import os
 import shutil
+import sys
 
-print("🧹 CLEANING UP PREDICTION MODEL PROJECT")
-print("=" * 60)
+# Collect all output and write it to stdout once at the end
+out = io.StringIO()
+
+print("🧹 CLEANING UP PREDICTION MODEL PROJECT", file=out)
+print("=" * 60, file=out)
 
 # Create archive directories
 os.makedirs('archive/test_files', exist_ok=True)
 os.makedirs('archive/fix_scripts', exist_ok=True)
 os.makedirs('archive/old_versions', exist_ok=True)
-print("✓ Created archive directories")
+print("✓ Created archive directories", file=out)
 
 # Move test files
 test_files = ['test_advanced.py', 'test_connection.py', 'test_enhanced.py', 'test_model.py']
 for f in test_files:
     if os.path.exists(f):
         shutil.move(f, f'archive/test_files/{f}')
-        print(f"  Archived: {f}")
+        print(f"  Archived: {f}", file=out)
 
 # Move fix scripts
 fix_files = ['fix_column.py', 'fix_decimal_issues.py', 'fix_deploy.py', 'fix_deploy_enhanced.py']
 for f in fix_files:
     if os.path.exists(f):
         shutil.move(f, f'archive/fix_scripts/{f}')
-        print(f"  Archived: {f}")
+        print(f"  Archived: {f}", file=out)
 
 # Move old versions
 old_files = [
@@ -39,7 +44,7 @@ old_files = [
 for f in old_files:
     if os.path.exists(f):
         shutil.move(f, f'archive/old_versions/{f}')
-        print(f"  Archived: {f}")
+        print(f"  Archived: {f}", file=out)
 
 # Move cleanup script itself
 if os.path.exists('cleanup_project.py'):
@@ -50,22 +55,24 @@ if os.path.exists('deploy_enhanced_clear.py'):
     if os.path.exists('deploy_enhanced.py'):
         shutil.move('deploy_enhanced.py', 'archive/old_versions/deploy_enhanced_original.py')
     shutil.move('deploy_enhanced_clear.py', 'deploy_enhanced.py')
-    print("✓ Updated deploy_enhanced.py to clear version")
+    print("✓ Updated deploy_enhanced.py to clear version", file=out)
 
-print("\n" + "=" * 60)
-print("✅ CLEANUP COMPLETE!")
-print("=" * 60)
+print("\n" + "=" * 60, file=out)
+print("✅ CLEANUP COMPLETE!", file=out)
+print("=" * 60, file=out)
 
 # Show what's left
-print("\n📁 Remaining Python files:")
+print("\n📁 Remaining Python files:", file=out)
 for f in os.listdir('.'):
     if f.endswith('.py'):
         size = os.path.getsize(f) / 1024
-        print(f"  ✓ {f:<30} ({size:.1f} KB)")
+        print(f"  ✓ {f:<30} ({size:.1f} KB)", file=out)
+
+print("\n🎯 Essential files kept:", file=out)
+print("  • db_config.py - Database configuration", file=out)
+print("  • enhanced_predictor.py - Main prediction model", file=out)
+print("  • deploy_enhanced.py - Deployment script", file=out)
+print("\n📂 All other files moved to archive/", file=out)
+print("\nTo remove archive: rm -rf archive/", file=out)
 
-print("\n🎯 Essential files kept:")
-print("  • db_config.py - Database configuration")
-print("  • enhanced_predictor.py - Main prediction model")
-print("  • deploy_enhanced.py - Deployment script")
-print("\n📂 All other files moved to archive/")
-print("\nTo remove archive: rm -rf archive/")
+sys.stdout.write(out.getvalue())
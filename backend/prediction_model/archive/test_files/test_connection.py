@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
-from db_config import DB_CONFIG
-import mysql.connector
+from db_pool import get_connection
 
 try:
-    conn = mysql.connector.connect(**DB_CONFIG)
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Test query
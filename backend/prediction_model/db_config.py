@@ -4,5 +4,6 @@ DB_CONFIG = {
     'port': 25060,
     'user': 'doadmin',
     'password': 'AVNS_OWqdUdZ2Nw_YCkGI5Eu',
-    'database': 'productivity_tracker'
+    'database': 'productivity_tracker',
+    'use_pure': False  # C extension (_mysql_connector), not the pure-Python protocol
 }
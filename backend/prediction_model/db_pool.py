@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Shared MySQL connection pool for the prediction scripts
+Connections are opened once per process and handed back on close()
+"""
+
+from db_config import DB_CONFIG
+from mysql.connector import pooling
+
+POOL_SIZE = 4
+
+_pool = None
+
+def get_connection():
+    """Borrow a connection from the pool (created on first use)"""
+    global _pool
+    if _pool is None:
+        _pool = pooling.MySQLConnectionPool(
+            pool_name='prediction_model',
+            pool_size=POOL_SIZE,
+            pool_reset_session=True,
+            autocommit=False,  # callers commit explicitly (deploy_enhanced batches all upserts)
+            **DB_CONFIG
+        )
+    return _pool.get_connection()
@@ -3,12 +3,17 @@
 Enhanced deployment that CLEARLY shows real demand vs QC capacity
 """
 
-from enhanced_predictor import EnhancedWarehousePredictor
-from db_config import DB_CONFIG
-import mysql.connector
-from datetime import datetime, timedelta
+from enhanced_predictor import get_predictor
+from db_pool import get_connection
+from datetime import datetime
 import json
 import logging
+import queue
+import re
+import sys
+import threading
+from functools import lru_cache
+from itertools import chain
 
 logging.basicConfig(
     filename='enhanced_predictions.log',
@@ -16,42 +21,122 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def deploy_enhanced_predictions():
-    """Generate and store enhanced predictions with CLEAR visibility"""
+# One-time schema setup, run with `python3 deploy_enhanced.py --init`
+SQL_CREATE_ENHANCED = """
+    CREATE TABLE IF NOT EXISTS predictions_enhanced (
+        prediction_date DATE PRIMARY KEY,
+        predicted_orders INT,
+        real_demand INT,
+        lower_bound INT,
+        upper_bound INT,
+        confidence_score INT,
+        factors JSON,
+        qc_constrained BOOLEAN DEFAULT FALSE,
+        overflow_items INT DEFAULT 0,
+        holiday_name VARCHAR(100),
+        warnings TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Upsert statements, prepared once per run and re-bound for each day
+SQL_ORIG = """
+    INSERT INTO order_predictions 
+    (prediction_date, predicted_orders, confidence_score)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+    predicted_orders = VALUES(predicted_orders),
+    confidence_score = VALUES(confidence_score)
+"""
+
+SQL_ENH = """
+    INSERT INTO predictions_enhanced
+    (prediction_date, predicted_orders, real_demand, lower_bound, upper_bound,
+     confidence_score, factors, qc_constrained, overflow_items,
+     holiday_name, warnings)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+    predicted_orders = VALUES(predicted_orders),
+    real_demand = VALUES(real_demand),
+    lower_bound = VALUES(lower_bound),
+    upper_bound = VALUES(upper_bound),
+    confidence_score = VALUES(confidence_score),
+    factors = VALUES(factors),
+    qc_constrained = VALUES(qc_constrained),
+    overflow_items = VALUES(overflow_items),
+    holiday_name = VALUES(holiday_name),
+    warnings = VALUES(warnings)
+"""
+
+# Days of rows handed to the writer thread per batch
+WRITE_BATCH_DAYS = 7
+
+_VALUES_GROUP = re.compile(r'VALUES \((%s(?:, %s)*)\)')
+
+@lru_cache(maxsize=None)
+def _multi_row_sql(sql, n_rows):
+    """Expand the single-row VALUES (...) group of sql into n_rows groups"""
+    return _VALUES_GROUP.sub(
+        lambda m: 'VALUES ' + ', '.join([f'({m.group(1)})'] * n_rows), sql, count=1
+    )
+
+def _db_writer(pcur_orig, pcur_enh, batches, errors):
+    """Drain (rows_orig, rows_enh) batches from the queue until a None sentinel"""
+    while True:
+        batch = batches.get()
+        if batch is None:
+            break
+        if errors:
+            continue  # keep draining so the producer never blocks
+        try:
+            rows_orig, rows_enh = batch
+            # One multi-row INSERT per table per batch
+            pcur_orig.execute(_multi_row_sql(SQL_ORIG, len(rows_orig)), tuple(chain.from_iterable(rows_orig)))
+            pcur_enh.execute(_multi_row_sql(SQL_ENH, len(rows_enh)), tuple(chain.from_iterable(rows_enh)))
+        except Exception as e:
+            errors.append(e)
+
+def deploy_enhanced_predictions(init_schema=False):
+    """Generate and store enhanced predictions with CLEAR visibility
+    
+    init_schema: also create the predictions_enhanced table (first deploy only)
+    """
     
     try:
         print(f"\n🚀 Generating Enhanced Predictions - {datetime.now()}")
         print("=" * 90)
         
         # Initialize
-        predictor = EnhancedWarehousePredictor()
-        predictor.train_enhanced()
+        predictor = get_predictor()
+        predictor.save_patterns()
         
-        # Database connection
-        conn = mysql.connector.connect(**DB_CONFIG)
+        # Pooled connection (C extension driver via DB_CONFIG, autocommit off in db_pool;
+        # single commit after all upserts)
+        conn = get_connection()
         cursor = conn.cursor()
         
-        # Create extended predictions table if needed
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS predictions_enhanced (
-                prediction_date DATE PRIMARY KEY,
-                predicted_orders INT,
-                real_demand INT,
-                lower_bound INT,
-                upper_bound INT,
-                confidence_score INT,
-                factors JSON,
-                qc_constrained BOOLEAN DEFAULT FALSE,
-                overflow_items INT DEFAULT 0,
-                holiday_name VARCHAR(100),
-                warnings TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Schema is created once via `--init`, not on every cron run
+        if init_schema:
+            cursor.execute(SQL_CREATE_ENHANCED)
+        
+        # Prepared cursors: the server parses each INSERT once, then only params are sent.
+        # A prepared cursor keeps just its last statement, so each table gets its own;
+        # sharing one would re-prepare on every switch between the two INSERTs
+        pcur_orig = conn.cursor(prepared=True)
+        pcur_enh = conn.cursor(prepared=True)
+        
+        # Writer thread issues the INSERTs while the main thread keeps predicting
+        batches = queue.Queue(maxsize=8)
+        writer_errors = []
+        writer = threading.Thread(target=_db_writer, args=(pcur_orig, pcur_enh, batches, writer_errors))
+        writer.start()
+        rows_orig = []
+        rows_enh = []
         
         saved_count = 0
         overflow_total = 0
         alerts = []
+        week_lines = []  # first-week table rows, written in one go after the loop
         
         print("\n📅 NEXT 7 DAYS FORECAST - SHOWING REAL DEMAND vs QC CAPACITY:")
         print("-" * 90)
@@ -59,90 +144,79 @@ def deploy_enhanced_predictions():
         print("-" * 90)
         
         # Generate predictions for next 30 days
-        for i in range(30):
-            date = datetime.now().date() + timedelta(days=i)
-            result = predictor.predict_enhanced(date, verbose=False)
-            
-            # Get the REAL DEMAND (unconstrained)
-            day_name = result['day_name']
-            if day_name in predictor.patterns['day_of_week']:
-                real_demand = int(predictor.patterns['day_of_week'][day_name]['average'])
-            else:
-                real_demand = int(predictor.base_average)
-            
-            # What QC can actually handle
-            qc_capacity = result['predicted_orders']
-            overflow = result.get('overflow', 0)
-            
-            # Prepare data for storage
-            factors_json = json.dumps(result.get('factors', []))
-            holiday_info = predictor.detect_holidays(date)
-            
-            # Store in original predictions table
-            cursor.execute("""
-                INSERT INTO order_predictions 
-                (prediction_date, predicted_orders, confidence_score)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                predicted_orders = VALUES(predicted_orders),
-                confidence_score = VALUES(confidence_score)
-            """, (
-                date, 
-                qc_capacity,  # Store QC-limited number
-                result['confidence']
-            ))
-            
-            # Store in enhanced table with BOTH numbers
-            cursor.execute("""
-                INSERT INTO predictions_enhanced
-                (prediction_date, predicted_orders, real_demand, lower_bound, upper_bound,
-                 confidence_score, factors, qc_constrained, overflow_items,
-                 holiday_name, warnings)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                predicted_orders = VALUES(predicted_orders),
-                real_demand = VALUES(real_demand),
-                lower_bound = VALUES(lower_bound),
-                upper_bound = VALUES(upper_bound),
-                confidence_score = VALUES(confidence_score),
-                factors = VALUES(factors),
-                qc_constrained = VALUES(qc_constrained),
-                overflow_items = VALUES(overflow_items),
-                holiday_name = VALUES(holiday_name),
-                warnings = VALUES(warnings)
-            """, (
-                date,
-                qc_capacity,  # What we can handle
-                real_demand,  # What's actually coming
-                result.get('lower_bound', 0),
-                result.get('upper_bound', 0),
-                result['confidence'],
-                factors_json,
-                result.get('qc_constraint', False),
-                overflow,
-                holiday_info.get('name'),
-                result.get('warning')
-            ))
-            
-            saved_count += 1
-            overflow_total += overflow
-            
-            # Track alerts
-            if overflow > 0:
-                alerts.append({
-                    'date': date,
-                    'real_demand': real_demand,
-                    'qc_capacity': qc_capacity,
-                    'overflow': overflow
-                })
-            
-            # Print detailed info for first week
-            if i < 7:
-                status = "✅ OK" if overflow == 0 else "⚠️ OVERFLOW"
-                overflow_str = f"{overflow} items" if overflow > 0 else "—"
+        try:
+            predictions = predictor.predict_range(datetime.now().date(), 30)
+            for i, result in enumerate(predictions):
+                date = result['date']
+                day_name = result['day_name']
+                
+                # Get the REAL DEMAND (unconstrained)
+                real_demand = result['real_demand']
+                
+                # What QC can actually handle
+                qc_capacity = result['predicted_orders']
+                overflow = result.get('overflow', 0)
+                
+                # Prepare data for storage
+                factors_json = json.dumps(result.get('factors', []))
+                holiday_info = result['holiday']
                 
-                print(f"{str(date):<12} {day_name:<10} {real_demand:>10} items → {qc_capacity:>10} items   {overflow_str:<12} {status:<20}")
+                # Row for original predictions table
+                rows_orig.append((
+                    date, 
+                    qc_capacity,  # Store QC-limited number
+                    result['confidence']
+                ))
+                
+                # Row for enhanced table with BOTH numbers
+                rows_enh.append((
+                    date,
+                    qc_capacity,  # What we can handle
+                    real_demand,  # What's actually coming
+                    result.get('lower_bound', 0),
+                    result.get('upper_bound', 0),
+                    result['confidence'],
+                    factors_json,
+                    result.get('qc_constraint', False),
+                    overflow,
+                    holiday_info.get('name'),
+                    result.get('warning')
+                ))
+                
+                if len(rows_orig) >= WRITE_BATCH_DAYS:
+                    batches.put((rows_orig, rows_enh))
+                    rows_orig = []
+                    rows_enh = []
+                
+                saved_count += 1
+                overflow_total += overflow
+                
+                # Track alerts
+                if overflow > 0:
+                    alerts.append({
+                        'date': date,
+                        'real_demand': real_demand,
+                        'qc_capacity': qc_capacity,
+                        'overflow': overflow
+                    })
+                
+                # Print detailed info for first week
+                if i < 7:
+                    status = "✅ OK" if overflow == 0 else "⚠️ OVERFLOW"
+                    overflow_str = f"{overflow} items" if overflow > 0 else "—"
+                    
+                    week_lines.append(f"{str(date):<12} {day_name:<10} {real_demand:>10} items → {qc_capacity:>10} items   {overflow_str:<12} {status:<20}\n")
+            
+            if rows_orig:
+                batches.put((rows_orig, rows_enh))
+        finally:
+            batches.put(None)
+            writer.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
         
+        sys.stdout.write(''.join(week_lines))
         print("-" * 90)
         
         conn.commit()
@@ -168,8 +242,12 @@ def deploy_enhanced_predictions():
         # Log summary
         logging.info(f"Generated {saved_count} predictions. Real demand clearly shown vs QC capacity.")
         
+        pcur_orig.close()
+        pcur_enh.close()
         cursor.close()
         conn.close()
+        # Hand the predictor's pooled connection back; the shared trained instance
+        # stays cached and borrows a new one if a later caller needs it
         predictor.close()
         
         # Show the key insight
@@ -188,6 +266,6 @@ def deploy_enhanced_predictions():
         return False
 
 if __name__ == "__main__":
-    success = deploy_enhanced_predictions()
+    success = deploy_enhanced_predictions(init_schema='--init' in sys.argv)
     if success:
         print("\n🎯 Use 'python3 show_real_numbers.py' to see detailed analysis")
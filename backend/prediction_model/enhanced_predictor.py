@@ -4,13 +4,16 @@ Enhanced Warehouse Prediction Model v3
 Includes holidays, QC constraints, weather, and customer patterns
 """
 
-from db_config import DB_CONFIG
-import mysql.connector
+from db_pool import get_connection
 from datetime import datetime, timedelta
 import numpy as np
 from collections import defaultdict
 import logging
 import json
+import os
+import pickle
+import time
+from functools import lru_cache
 
 
 def safe_float(value, default=0):
@@ -22,9 +25,95 @@ def safe_float(value, default=0):
     except (TypeError, ValueError):
         return default
 
+# Trained patterns persisted by deploy_enhanced for read-only scripts
+PATTERNS_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'predictor_patterns.pkl')
+PATTERNS_MAX_AGE = 24 * 3600  # seconds
+
+# Day names indexed by date.weekday()
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# US Federal Holidays and retail events
+HOLIDAYS_2025 = {
+    '2025-01-01': {'name': 'New Year', 'impact': 0.3},  # 70% reduction
+    '2025-01-20': {'name': 'MLK Day', 'impact': 0.8},
+    '2025-02-14': {'name': 'Valentine\'s Day', 'impact': 1.2},  # 20% increase
+    '2025-02-17': {'name': 'Presidents Day', 'impact': 0.8},
+    '2025-05-26': {'name': 'Memorial Day', 'impact': 0.5},
+    '2025-07-04': {'name': 'Independence Day', 'impact': 0.4},
+    '2025-09-01': {'name': 'Labor Day', 'impact': 0.6},
+    '2025-10-13': {'name': 'Columbus Day', 'impact': 0.9},
+    '2025-11-11': {'name': 'Veterans Day', 'impact': 0.9},
+    '2025-11-27': {'name': 'Thanksgiving', 'impact': 0.2},
+    '2025-11-28': {'name': 'Black Friday', 'impact': 1.8},  # 80% increase
+    '2025-12-01': {'name': 'Cyber Monday', 'impact': 1.6},
+    '2025-12-24': {'name': 'Christmas Eve', 'impact': 0.5},
+    '2025-12-25': {'name': 'Christmas', 'impact': 0.1},
+    '2025-12-31': {'name': 'New Year\'s Eve', 'impact': 0.6}
+}
+
+
+@lru_cache(maxsize=512)
+def _detect_holidays(target_date):
+    """Holiday lookup for a date; memoized since the table is static"""
+    date_str = target_date.strftime('%Y-%m-%d')
+    
+    # Direct holiday
+    if date_str in HOLIDAYS_2025:
+        holiday = HOLIDAYS_2025[date_str]
+        return {
+            'is_holiday': True,
+            'name': holiday['name'],
+            'multiplier': holiday['impact'],
+            'type': 'direct'
+        }
+    
+    # Day after holiday (catch-up effect)
+    yesterday = (target_date - timedelta(days=1)).strftime('%Y-%m-%d')
+    if yesterday in HOLIDAYS_2025:
+        holiday = HOLIDAYS_2025[yesterday]
+        if holiday['impact'] < 0.5:  # Major holiday
+            return {
+                'is_holiday': False,
+                'name': f"Day after {holiday['name']}",
+                'multiplier': 1.4,  # 40% boost
+                'type': 'day_after'
+            }
+    
+    # Week before major holidays
+    for days_ahead in range(1, 8):
+        future_date = (target_date + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+        if future_date in HOLIDAYS_2025:
+            holiday = HOLIDAYS_2025[future_date]
+            if holiday['name'] in ['Christmas', 'Thanksgiving']:
+                return {
+                    'is_holiday': False,
+                    'name': f"Week before {holiday['name']}",
+                    'multiplier': 1.15,  # 15% boost
+                    'type': 'pre_holiday'
+                }
+    
+    return {
+        'is_holiday': False,
+        'name': None,
+        'multiplier': 1.0,
+        'type': 'regular'
+    }
+
+
+def load_cached_patterns(path=PATTERNS_CACHE, max_age=PATTERNS_MAX_AGE):
+    """Return patterns saved by save_patterns(), or None if missing or stale"""
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
 class EnhancedWarehousePredictor:
     def __init__(self):
-        self.conn = mysql.connector.connect(**DB_CONFIG)
+        self._conn = None
         self.base_average = 0
         self.patterns = {
             'day_of_week': {},
@@ -37,6 +126,13 @@ class EnhancedWarehousePredictor:
         }
         self.accuracy_history = []
         self.qc_capacity = self.calculate_qc_capacity()
+    
+    @property
+    def conn(self):
+        """Pooled connection, borrowed on first use and handed back by close()"""
+        if self._conn is None:
+            self._conn = get_connection()
+        return self._conn
         
     def calculate_qc_capacity(self):
         """Determine actual QC capacity from historical data"""
@@ -68,75 +164,13 @@ class EnhancedWarehousePredictor:
     
     def detect_holidays(self, target_date):
         """Comprehensive holiday detection with impact"""
-        
-        # US Federal Holidays and retail events
-        holidays_2025 = {
-            '2025-01-01': {'name': 'New Year', 'impact': 0.3},  # 70% reduction
-            '2025-01-20': {'name': 'MLK Day', 'impact': 0.8},
-            '2025-02-14': {'name': 'Valentine\'s Day', 'impact': 1.2},  # 20% increase
-            '2025-02-17': {'name': 'Presidents Day', 'impact': 0.8},
-            '2025-05-26': {'name': 'Memorial Day', 'impact': 0.5},
-            '2025-07-04': {'name': 'Independence Day', 'impact': 0.4},
-            '2025-09-01': {'name': 'Labor Day', 'impact': 0.6},
-            '2025-10-13': {'name': 'Columbus Day', 'impact': 0.9},
-            '2025-11-11': {'name': 'Veterans Day', 'impact': 0.9},
-            '2025-11-27': {'name': 'Thanksgiving', 'impact': 0.2},
-            '2025-11-28': {'name': 'Black Friday', 'impact': 1.8},  # 80% increase
-            '2025-12-01': {'name': 'Cyber Monday', 'impact': 1.6},
-            '2025-12-24': {'name': 'Christmas Eve', 'impact': 0.5},
-            '2025-12-25': {'name': 'Christmas', 'impact': 0.1},
-            '2025-12-31': {'name': 'New Year\'s Eve', 'impact': 0.6}
-        }
-        
-        date_str = target_date.strftime('%Y-%m-%d')
-        
-        # Direct holiday
-        if date_str in holidays_2025:
-            holiday = holidays_2025[date_str]
-            return {
-                'is_holiday': True,
-                'name': holiday['name'],
-                'multiplier': holiday['impact'],
-                'type': 'direct'
-            }
-        
-        # Day after holiday (catch-up effect)
-        yesterday = (target_date - timedelta(days=1)).strftime('%Y-%m-%d')
-        if yesterday in holidays_2025:
-            holiday = holidays_2025[yesterday]
-            if holiday['impact'] < 0.5:  # Major holiday
-                return {
-                    'is_holiday': False,
-                    'name': f"Day after {holiday['name']}",
-                    'multiplier': 1.4,  # 40% boost
-                    'type': 'day_after'
-                }
-        
-        # Week before major holidays
-        for days_ahead in range(1, 8):
-            future_date = (target_date + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
-            if future_date in holidays_2025:
-                holiday = holidays_2025[future_date]
-                if holiday['name'] in ['Christmas', 'Thanksgiving']:
-                    return {
-                        'is_holiday': False,
-                        'name': f"Week before {holiday['name']}",
-                        'multiplier': 1.15,  # 15% boost
-                        'type': 'pre_holiday'
-                    }
-        
-        return {
-            'is_holiday': False,
-            'name': None,
-            'multiplier': 1.0,
-            'type': 'regular'
-        }
+        return dict(_detect_holidays(target_date))
     
     def apply_qc_constraint(self, prediction, date):
         """Apply realistic QC capacity constraints"""
         
         # Check if QC is running that day
-        day_name = date.strftime('%A')
+        day_name = DAY_NAMES[date.weekday()]
         
         # Reduced capacity on weekends
         if day_name == 'Saturday':
@@ -164,14 +198,34 @@ class EnhancedWarehousePredictor:
             'reason': None
         }
     
-    def detect_customer_patterns(self, target_date):
-        """Detect recurring customer order patterns"""
+    def load_day_of_month_averages(self):
+        """Historical average orders per day of month (days with >= 3 samples)"""
         
         cursor = self.conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT 
+                DAY(prediction_date) as day,
+                AVG(actual_orders) as avg_orders
+            FROM order_predictions
+            WHERE actual_orders IS NOT NULL
+            GROUP BY DAY(prediction_date)
+            HAVING COUNT(*) >= 3
+        """)
+        
+        averages = {row['day']: row['avg_orders'] for row in cursor.fetchall()}
+        cursor.close()
+        return averages
+    
+    def detect_customer_patterns(self, target_date, day_of_month_avgs=None):
+        """Detect recurring customer order patterns
+        
+        day_of_month_avgs: optional result of load_day_of_month_averages(),
+        used instead of querying per date when predicting a range
+        """
         
         # Check for patterns on this day of month
         day_of_month = target_date.day
-        day_name = target_date.strftime('%A')
+        day_name = DAY_NAMES[target_date.weekday()]
         
         # First Monday pattern (already detected in training)
         if day_of_month <= 7 and day_name == 'Monday':
@@ -181,6 +235,19 @@ class EnhancedWarehousePredictor:
         if day_of_month >= 25:
             return {'multiplier': 0.95, 'pattern': 'Month-end'}
         
+        if day_of_month_avgs is not None:
+            avg_orders = day_of_month_avgs.get(day_of_month)
+            if avg_orders is not None and self.base_average > 0:
+                multiplier = safe_float(avg_orders) / self.base_average
+                if multiplier > 1.2 or multiplier < 0.8:  # Significant pattern
+                    return {
+                        'multiplier': multiplier,
+                        'pattern': f'Day {day_of_month} pattern'
+                    }
+            return {'multiplier': 1.0, 'pattern': None}
+        
+        cursor = self.conn.cursor(dictionary=True)
+        
         # Check historical patterns for specific date patterns
         cursor.execute("""
             SELECT 
@@ -310,7 +377,15 @@ class EnhancedWarehousePredictor:
         cursor.close()
         return True
     
-    def predict_enhanced(self, target_date, verbose=False):
+    def save_patterns(self, path=PATTERNS_CACHE):
+        """Persist trained patterns so other scripts can skip retraining"""
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(self.patterns, f)
+        except OSError as e:
+            logging.warning(f"Could not save patterns cache: {e}")
+    
+    def predict_enhanced(self, target_date, verbose=False, day_of_month_avgs=None):
         """Make enhanced prediction with all factors"""
         
         # Start with base
@@ -319,7 +394,7 @@ class EnhancedWarehousePredictor:
         confidence = 75
         
         # 1. Day of week (with auto-adjustment)
-        day_name = target_date.strftime('%A')
+        day_name = DAY_NAMES[target_date.weekday()]
         if day_name in self.patterns['day_of_week']:
             day_mult = self.patterns['day_of_week'][day_name]['multiplier']
             
@@ -343,7 +418,7 @@ class EnhancedWarehousePredictor:
                 confidence -= 10  # Less confident on holidays
         
         # 3. Customer patterns
-        customer_pattern = self.detect_customer_patterns(target_date)
+        customer_pattern = self.detect_customer_patterns(target_date, day_of_month_avgs)
         if customer_pattern['multiplier'] != 1.0:
             prediction *= customer_pattern['multiplier']
             factors.append(f"{customer_pattern['pattern']}: ×{customer_pattern['multiplier']:.2f}")
@@ -359,7 +434,8 @@ class EnhancedWarehousePredictor:
             'confidence': confidence,
             'factors': factors,
             'qc_constraint': qc_result['constraint_applied'],
-            'overflow': qc_result['overflow']
+            'overflow': qc_result['overflow'],
+            'holiday': holiday_info
         }
         
         if qc_result['constraint_applied']:
@@ -387,6 +463,23 @@ class EnhancedWarehousePredictor:
         
         return final_prediction
     
+    def predict_range(self, start_date, n):
+        """Yield enhanced predictions for n consecutive days from start_date
+        
+        Day-of-month history is loaded with one query up front, and each
+        result also carries 'real_demand' (unconstrained day-of-week average).
+        """
+        
+        day_of_month_avgs = self.load_day_of_month_averages()
+        dow_avg = {day: int(p['average']) for day, p in self.patterns['day_of_week'].items()}
+        default_demand = int(self.base_average)
+        
+        for i in range(n):
+            target_date = start_date + timedelta(days=i)
+            result = self.predict_enhanced(target_date, day_of_month_avgs=day_of_month_avgs)
+            result['real_demand'] = dow_avg.get(result['day_name'], default_demand)
+            yield result
+    
     def simulate_week_with_constraints(self, start_date=None):
         """Simulate a week showing QC constraints and overflow"""
         
@@ -423,5 +516,19 @@ class EnhancedWarehousePredictor:
         }
     
     def close(self):
-        if self.conn:
-            self.conn.close()
+        """Return the pooled connection; the trained state stays usable"""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+
+@lru_cache(maxsize=1)
+def get_predictor():
+    """Trained predictor shared by every caller in this process
+    
+    Call close() when done so the shared instance does not pin a db_pool slot;
+    it borrows a fresh connection if it is used again.
+    """
+    predictor = EnhancedWarehousePredictor()
+    predictor.train_enhanced()
+    return predictor
@@ -4,6 +4,7 @@ Main daily prediction runner
 """
 
 from deploy_enhanced import deploy_enhanced_predictions
+import show_analysis
 from datetime import datetime
 
 print(f"\n{'='*60}")
@@ -14,6 +15,10 @@ try:
     success = deploy_enhanced_predictions()
     if success:
         print("\n✅ Predictions completed successfully!")
+        # Reads the patterns the deploy step just saved (save_patterns), so
+        # nothing is retrained; it only falls back to get_predictor() if that
+        # cache is missing or stale
+        show_analysis.main()
     else:
         print("\n❌ Prediction failed")
 except Exception as e:
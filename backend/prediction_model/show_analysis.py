@@ -3,50 +3,67 @@
 Show real demand vs capacity
 """
 
-from enhanced_predictor import EnhancedWarehousePredictor
-from db_config import DB_CONFIG
-import mysql.connector
+from enhanced_predictor import DAY_NAMES, get_predictor, load_cached_patterns
+from db_pool import get_connection
 from datetime import datetime
 
-conn = mysql.connector.connect(**DB_CONFIG)
-cursor = conn.cursor(dictionary=True)
-
-print(f"\n{'='*70}")
-print("📊 DEMAND vs CAPACITY - NEXT 7 DAYS")
-print(f"{'='*70}\n")
-
-# Get predictions
-cursor.execute("""
-    SELECT 
-        prediction_date,
-        DAYNAME(prediction_date) as day,
-        predicted_orders
-    FROM order_predictions
-    WHERE prediction_date >= CURDATE()
-    ORDER BY prediction_date
-    LIMIT 7
-""")
-
-predictor = EnhancedWarehousePredictor()
-predictor.train_enhanced()
-
-for row in cursor.fetchall():
-    day = row['day']
-    qc_limit = row['predicted_orders']
-    
-    # Get real demand
-    if day in predictor.patterns['day_of_week']:
-        demand = int(predictor.patterns['day_of_week'][day]['average'])
-    else:
-        demand = 1138
-    
-    overflow = max(0, demand - qc_limit)
-    status = "⚠️ OVERFLOW" if overflow > 0 else "✅ OK"
+def main():
+    """Print real demand vs QC capacity for the next 7 days"""
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    print(f"\n{'='*70}")
+    print("📊 DEMAND vs CAPACITY - NEXT 7 DAYS")
+    print(f"{'='*70}\n")
+
+    # Reuse patterns from the last deploy run; retrain only if missing or stale
+    patterns = load_cached_patterns()
+    if patterns is None:
+        predictor = get_predictor()
+        patterns = predictor.patterns
+        predictor.close()
+
+    # Real demand per weekday, loaded into a session temp table for the join
+    dow_patterns = patterns['day_of_week']
+    cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS dow_demand (
+            day VARCHAR(10) PRIMARY KEY,
+            demand INT
+        )
+    """)
+    cursor.executemany(
+        "REPLACE INTO dow_demand (day, demand) VALUES (%s, %s)",
+        [(d, int(dow_patterns.get(d, {'average': 1138})['average'])) for d in DAY_NAMES]
+    )
+
+    # Get predictions with demand and overflow computed server-side
+    cursor.execute("""
+        SELECT 
+            p.prediction_date,
+            DAYNAME(p.prediction_date) as day,
+            p.predicted_orders as qc_limit,
+            COALESCE(d.demand, 1138) as demand,
+            GREATEST(0, COALESCE(d.demand, 1138) - p.predicted_orders) as overflow
+        FROM order_predictions p
+        LEFT JOIN dow_demand d ON d.day = DAYNAME(p.prediction_date)
+        WHERE p.prediction_date >= CURDATE()
+        ORDER BY p.prediction_date
+        LIMIT 7
+    """)
+
+    for row in cursor.fetchall():
+        day = row['day']
+        qc_limit = row['qc_limit']
+        demand = row['demand']
+        overflow = row['overflow']
+        status = "⚠️ OVERFLOW" if overflow > 0 else "✅ OK"
     
-    print(f"{row['prediction_date']} ({day:9}): Demand={demand:4} → QC={qc_limit:4} [{status}]")
-    if overflow > 0:
-        print(f"{'':23} Need {overflow/150:.1f} overtime hours")
+        print(f"{row['prediction_date']} ({day:9}): Demand={demand:4} → QC={qc_limit:4} [{status}]")
+        if overflow > 0:
+            print(f"{'':23} Need {overflow/150:.1f} overtime hours")
+
+    cursor.close()
+    conn.close()
 
-cursor.close()
-conn.close()
-predictor.close()
+if __name__ == "__main__":
+    main()
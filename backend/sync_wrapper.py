@@ -13,8 +13,8 @@ def main():
         mode = sys.argv[1]
         
         if mode == "continuous":
-            print("Starting continuous sync (5-minute intervals)...")
-            sync.run_continuous_sync(interval_minutes=3)
+            print("Starting continuous sync (adaptive 30s-5min intervals)...")
+            sync.run_continuous_sync(min_interval=30, max_interval=300)
             
         elif mode == "today":
             print(f"Syncing today's activities...")
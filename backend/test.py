@@ -9,6 +9,9 @@ endpoints = [
     "/api/bulk_activities"
 ]
 
-for endpoint in endpoints:
-    r = requests.post(f"{base_url}{endpoint}", json={"activities": []}, headers=headers)
-    print(f"{endpoint}: {r.status_code}")
\ No newline at end of file
+# One session so all POSTs reuse the same keep-alive connection
+with requests.Session() as session:
+    session.headers.update(headers)
+    for endpoint in endpoints:
+        r = session.post(f"{base_url}{endpoint}", json={"activities": []})
+        print(f"{endpoint}: {r.status_code}")
\ No newline at end of file
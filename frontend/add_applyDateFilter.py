@@ -1,24 +1,9 @@
 #!/usr/bin/env python3
+import re
 
-with open('manager.html', 'r') as f:
-    lines = f.readlines()
+SET_DATE_RANGE_START = re.compile(r'function setDateRange\b[^{]*\{')
 
-# Find where setDateRange was just added (around line 2638) and add applyDateFilter after it
-function_added = False
-for i, line in enumerate(lines):
-    if 'function setDateRange' in line:
-        # Find the end of setDateRange function
-        brace_count = 0
-        start_found = False
-        for j in range(i, min(i+50, len(lines))):
-            if '{' in lines[j]:
-                brace_count += lines[j].count('{')
-                start_found = True
-            if '}' in lines[j]:
-                brace_count -= lines[j].count('}')
-            if start_found and brace_count == 0:
-                # Add applyDateFilter after setDateRange
-                applyDateFilter_code = '''
+APPLY_DATE_FILTER_CODE = '''
         function applyDateFilter() {
             const startDate = document.getElementById('startDate').value;
             const endDate = document.getElementById('endDate').value;
@@ -60,17 +45,51 @@ for i, line in enumerate(lines):
             }
         }
 '''
-                lines[j] = lines[j] + applyDateFilter_code
-                function_added = True
-                print(f"Added applyDateFilter function after line {j}")
-                break
-        break
 
-# Write back
-with open('manager.html', 'w') as f:
-    f.writelines(lines)
 
-if function_added:
-    print("Successfully added applyDateFilter function")
-else:
-    print("Could not add applyDateFilter - you may need to add it manually")
+def apply_applyDateFilter(content):
+    """Add applyDateFilter() right after the setDateRange() function"""
+    if 'function applyDateFilter()' in content:
+        print("applyDateFilter function already present, skipping")
+        return content
+
+    function_added = False
+
+    # Find where setDateRange was just added and add applyDateFilter after it
+    match = SET_DATE_RANGE_START.search(content)
+    if match:
+        # Walk forward once from the opening brace to its matching close
+        depth = 1
+        for pos in range(match.end(), len(content)):
+            ch = content[pos]
+            if ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    # Add applyDateFilter after the line that closes setDateRange
+                    line_no = content.count('\n', 0, pos)
+                    line_end = content.find('\n', pos)
+                    insert_at = len(content) if line_end == -1 else line_end + 1
+                    content = content[:insert_at] + APPLY_DATE_FILTER_CODE + content[insert_at:]
+                    function_added = True
+                    print(f"Added applyDateFilter function after line {line_no}")
+                    break
+
+    if function_added:
+        print("Successfully added applyDateFilter function")
+    else:
+        print("Could not add applyDateFilter - you may need to add it manually")
+
+    return content
+
+
+if __name__ == "__main__":
+    with open('manager.html', 'r') as f:
+        content = f.read()
+
+    content = apply_applyDateFilter(content)
+
+    # Write back
+    with open('manager.html', 'w') as f:
+        f.write(content)
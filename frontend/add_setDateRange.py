@@ -1,15 +1,6 @@
 #!/usr/bin/env python3
 
-with open('manager.html', 'r') as f:
-    lines = f.readlines()
-
-# Find where to add the function (look for applyDateFilter)
-function_added = False
-for i, line in enumerate(lines):
-    if 'function applyDateFilter()' in line:
-        # Add setDateRange before applyDateFilter
-        indent = '        '
-        setDateRange_code = '''        function setDateRange(range) {
+SET_DATE_RANGE_CODE = '''        function setDateRange(range) {
             const today = api.getCentralDate();
             const startInput = document.getElementById('startDate');
             const endInput = document.getElementById('endDate');
@@ -35,17 +26,9 @@ for i, line in enumerate(lines):
         }
         
 '''
-        lines[i] = setDateRange_code + lines[i]
-        function_added = True
-        print(f"Added setDateRange function at line {i}")
-        break
 
-if not function_added:
-    print("Could not find applyDateFilter function, adding at end of script")
-    # Find the last </script> tag
-    for i in range(len(lines)-1, -1, -1):
-        if '</script>' in lines[i]:
-            lines[i] = '''        function setDateRange(range) {
+# Fallback copy (without the debug log) for pages that have no applyDateFilter yet
+SET_DATE_RANGE_FALLBACK_CODE = '''        function setDateRange(range) {
             const today = api.getCentralDate();
             const startInput = document.getElementById('startDate');
             const endInput = document.getElementById('endDate');
@@ -68,16 +51,51 @@ if not function_added:
             }
         }
         
-''' + lines[i]
+'''
+
+
+def apply_setDateRange(content):
+    """Add setDateRange() before applyDateFilter(), or before the last </script>"""
+    if 'function setDateRange' in content:
+        print("setDateRange function already present, skipping")
+        return content
+
+    # Find where to add the function (look for applyDateFilter)
+    function_added = False
+    pos = content.find('function applyDateFilter()')
+    if pos != -1:
+        # Add setDateRange before the line holding applyDateFilter
+        line_start = content.rfind('\n', 0, pos) + 1
+        line_no = content.count('\n', 0, line_start)
+        content = content[:line_start] + SET_DATE_RANGE_CODE + content[line_start:]
+        function_added = True
+        print(f"Added setDateRange function at line {line_no}")
+
+    if not function_added:
+        print("Could not find applyDateFilter function, adding at end of script")
+        # Find the last </script> tag
+        pos = content.rfind('</script>')
+        if pos != -1:
+            line_start = content.rfind('\n', 0, pos) + 1
+            line_no = content.count('\n', 0, line_start)
+            content = content[:line_start] + SET_DATE_RANGE_FALLBACK_CODE + content[line_start:]
             function_added = True
-            print(f"Added setDateRange function before line {i}")
-            break
+            print(f"Added setDateRange function before line {line_no}")
+
+    if function_added:
+        print("Successfully added setDateRange function")
+    else:
+        print("Failed to add setDateRange function")
+
+    return content
+
+
+if __name__ == "__main__":
+    with open('manager.html', 'r') as f:
+        content = f.read()
 
-# Write back
-with open('manager.html', 'w') as f:
-    f.writelines(lines)
+    content = apply_setDateRange(content)
 
-if function_added:
-    print("Successfully added setDateRange function")
-else:
-    print("Failed to add setDateRange function")
+    # Write back
+    with open('manager.html', 'w') as f:
+        f.write(content)
@@ -1,48 +1,12 @@
 
 #!/usr/bin/env python3
+import re
 
-print("Fixing manager.html issues...")
-
-with open('manager.html', 'r') as f:
-    content = f.read()
+DASHBOARD_DATA_DECL = re.compile(r'\b(?:let|var|const)\s+dashboardData\s*=')
+# Whole source line (with its newline) holding a dashboardData declaration
+DASHBOARD_DATA_DECL_LINE = re.compile(r'^[^\n]*' + DASHBOARD_DATA_DECL.pattern + r'[^\n]*\n?', re.M)
 
-# Count how many times dashboardData is declared
-import re
-declarations = re.findall(r'(let|var|const)\s+dashboardData\s*=', content)
-print(f"Found {len(declarations)} dashboardData declarations")
-
-# Remove duplicate declarations, keep only the first one
-if len(declarations) > 1:
-    # Keep the first, remove others
-    first_found = False
-    lines = content.split('\n')
-    new_lines = []
-    for line in lines:
-        if re.search(r'(let|var|const)\s+dashboardData\s*=', line):
-            if not first_found:
-                first_found = True
-                new_lines.append(line)
-                print(f"Keeping dashboardData declaration: {line.strip()}")
-            else:
-                print(f"Removing duplicate: {line.strip()}")
-                # Skip this line
-                continue
-        else:
-            new_lines.append(line)
-    content = '\n'.join(new_lines)
-
-# Now add the showSection function if it doesn't exist
-if 'function showSection' not in content:
-    print("Adding showSection function...")
-    
-    # Find a good place to add it (after other functions)
-    insert_pos = content.find('function applyDateFilter')
-    if insert_pos == -1:
-        insert_pos = content.find('function setDateRange')
-    
-    if insert_pos > 0:
-        # Add before the found function
-        showSection_code = '''
+SHOW_SECTION_CODE = '''
         function showSection(sectionName) {
             console.log('Showing section:', sectionName);
             
@@ -87,11 +51,58 @@ if 'function showSection' not in content:
         }
         
 '''
-        content = content[:insert_pos] + showSection_code + content[insert_pos:]
-        print("Added showSection function")
 
-# Write the fixed content
-with open('manager.html', 'w') as f:
-    f.write(content)
 
-print("Fixed manager.html issues")
+def fix_dashboard_issues(content):
+    """Drop duplicate dashboardData declarations and add showSection() if missing"""
+    # Count how many times dashboardData is declared
+    declarations = DASHBOARD_DATA_DECL.findall(content)
+    print(f"Found {len(declarations)} dashboardData declarations")
+
+    # Remove duplicate declarations, keep only the first one
+    if len(declarations) > 1:
+        # Keep the first, remove others in one pass over the string
+        first_found = False
+
+        def keep_first(match):
+            nonlocal first_found
+            line = match.group(0)
+            if not first_found:
+                first_found = True
+                print(f"Keeping dashboardData declaration: {line.strip()}")
+                return line
+            print(f"Removing duplicate: {line.strip()}")
+            return ''
+
+        content = DASHBOARD_DATA_DECL_LINE.sub(keep_first, content)
+
+    # Now add the showSection function if it doesn't exist
+    if 'function showSection' not in content:
+        print("Adding showSection function...")
+        
+        # Find a good place to add it (after other functions)
+        insert_pos = content.find('function applyDateFilter')
+        if insert_pos == -1:
+            insert_pos = content.find('function setDateRange')
+        
+        if insert_pos > 0:
+            # Add before the found function
+            content = content[:insert_pos] + SHOW_SECTION_CODE + content[insert_pos:]
+            print("Added showSection function")
+
+    return content
+
+
+if __name__ == "__main__":
+    print("Fixing manager.html issues...")
+
+    with open('manager.html', 'r') as f:
+        content = f.read()
+
+    content = fix_dashboard_issues(content)
+
+    # Write the fixed content
+    with open('manager.html', 'w') as f:
+        f.write(content)
+
+    print("Fixed manager.html issues")
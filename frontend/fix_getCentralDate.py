@@ -28,13 +28,41 @@ if old_function in content:
     content = content.replace(old_function, new_function)
     print("Fixed getCentralDate function")
 else:
-    # Try to find it another way
-    import re
-    pattern = r'getCentralDate\(\)\s*{\s*[^}]+\s*}'
-    match = re.search(pattern, content)
-    if match:
-        content = re.sub(pattern, new_function.replace('    ', ''), content)
-        print("Fixed getCentralDate function (regex)")
+    # Try to find it another way: locate the method header and walk its braces
+    start = content.find('getCentralDate()')
+    end = -1
+    while start != -1:
+        brace = start + len('getCentralDate()')
+        while brace < len(content) and content[brace].isspace():
+            brace += 1
+        if brace < len(content) and content[brace] == '{':
+            # Linear scan to the matching close brace, skipping // comments and strings
+            depth = 0
+            pos = brace
+            while pos < len(content):
+                ch = content[pos]
+                if content.startswith('//', pos):
+                    newline = content.find('\n', pos)
+                    pos = len(content) if newline == -1 else newline
+                    continue
+                if ch in '\'"`':
+                    pos += 1
+                    while pos < len(content) and content[pos] != ch:
+                        pos += 2 if content[pos] == '\\' else 1
+                elif ch == '{':
+                    depth += 1
+                elif ch == '}':
+                    depth -= 1
+                    if depth == 0:
+                        end = pos + 1
+                        break
+                pos += 1
+            break
+        # A call site rather than the definition; keep looking
+        start = content.find('getCentralDate()', brace)
+    if end != -1:
+        content = content[:start] + new_function.replace('    ', '') + content[end:]
+        print("Fixed getCentralDate function (brace scan)")
     else:
         print("Could not find getCentralDate function to fix")
 
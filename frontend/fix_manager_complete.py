@@ -1,65 +1,133 @@
 
 #!/usr/bin/env python3
+import mmap
+import os
+import shutil
+import tempfile
 
 print("Fixing manager.html date initialization...")
 
-# Read the file
-with open('manager.html', 'r') as f:
-    lines = f.readlines()
-
-# Find the DOMContentLoaded section
-for i, line in enumerate(lines):
-    if "document.addEventListener('DOMContentLoaded'" in line:
-        # Find where we initialize the chart (around line 1638)
-        for j in range(i, min(i+50, len(lines))):
-            if "// Initialize chart" in lines[j]:
-                # Add date initialization BEFORE chart initialization
-                indent = '            '
-                date_init_code = f'''{indent}// Initialize date inputs with today's date
-{indent}const today = api.getCentralDate();
-{indent}console.log('Setting initial date to:', today);
-{indent}document.getElementById('startDate').value = today;
-{indent}document.getElementById('endDate').value = today;
-{indent}
-{indent}// Store in dashboardData
-{indent}dashboardData.startDate = today;
-{indent}dashboardData.endDate = today;
-{indent}
-{indent}// Update the title to show today's date
-{indent}const titleElement = document.querySelector('.dashboard-title p');
-{indent}if (titleElement) {{
-{indent}    const dateObj = new Date(today + 'T12:00:00');  // Add time to avoid timezone issues
-{indent}    titleElement.textContent = `Data for ${{dateObj.toLocaleDateString('en-US', {{ weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' }})}}`; 
-{indent}}}
-{indent}
+# Locate the markers with C-level find() over a read-only mmap of manager.html,
+# then write the fixed copy to a sibling temp file and swap it in. Works on raw
+# bytes (the markers are ASCII), so the page is never decoded or re-encoded
+DOM_MARKER = b"document.addEventListener('DOMContentLoaded'"
+CHART_MARKER = b"// Initialize chart"
+COST_FN_MARKER = b"function loadCostAnalysisData()"
+START_DATE_EXPR = b"document.getElementById('startDate').value || api.getCentralDate()"
+END_DATE_EXPR = b"document.getElementById('endDate').value || api.getCentralDate()"
+
+# Date-input initialization injected before the chart setup (indentation baked in)
+DATE_INIT_CODE = b'''            // Initialize date inputs with today's date
+            const today = api.getCentralDate();
+            console.log('Setting initial date to:', today);
+            document.getElementById('startDate').value = today;
+            document.getElementById('endDate').value = today;
+            
+            // Store in dashboardData
+            dashboardData.startDate = today;
+            dashboardData.endDate = today;
+            
+            // Update the title to show today's date
+            const titleElement = document.querySelector('.dashboard-title p');
+            if (titleElement) {
+                const dateObj = new Date(today + 'T12:00:00');  // Add time to avoid timezone issues
+                titleElement.textContent = `Data for ${dateObj.toLocaleDateString('en-US', { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' })}`; 
+            }
+            
 '''
-                # Insert before the chart initialization
-                lines[j] = date_init_code + lines[j]
-                print(f"Added date initialization at line {j}")
-                break
-        break
-
-# Also find and fix the loadCostAnalysisData function to use the stored dates
-for i, line in enumerate(lines):
-    if "function loadCostAnalysisData()" in line:
-        # Look for where it gets the dates (around line 2175-2176)
-        for j in range(i, min(i+20, len(lines))):
-            if "document.getElementById('startDate').value || api.getCentralDate()" in lines[j]:
-                # Change to use dashboardData if available
-                lines[j] = lines[j].replace(
-                    "document.getElementById('startDate').value || api.getCentralDate()",
-                    "dashboardData.startDate || document.getElementById('startDate').value || api.getCentralDate()"
-                )
-                lines[j+1] = lines[j+1].replace(
-                    "document.getElementById('endDate').value || api.getCentralDate()",
-                    "dashboardData.endDate || document.getElementById('endDate').value || api.getCentralDate()"
-                )
-                print(f"Fixed loadCostAnalysisData date handling at line {j}")
-                break
-        break
-
-# Write back
-with open('manager.html', 'w') as f:
-    f.writelines(lines)
+
+# 1 MiB write buffer: the page goes to disk in a handful of large syscalls
+IO_BUFFER_SIZE = 1 << 20
+
+
+def line_start(data, pos):
+    """Offset of the start of the line containing pos"""
+    return data.rfind(b'\n', 0, pos) + 1
+
+
+def line_end(data, pos):
+    """Offset just past the newline ending the line containing pos"""
+    newline = data.find(b'\n', pos)
+    return len(data) if newline == -1 else newline + 1
+
+
+def line_number(data, pos):
+    """Zero-based number of the line containing pos"""
+    return data[:pos].count(b'\n')
+
+
+def skip_lines(data, pos, count):
+    """Offset of the start of the line count lines after the one starting at pos"""
+    for _ in range(count):
+        pos = line_end(data, pos)
+    return pos
+
+
+def find_edits(data):
+    """Return (start, end, replacement) edits for the page, in file order"""
+    edits = []
+
+    # Find the DOMContentLoaded section
+    dom = data.find(DOM_MARKER)
+    if dom != -1:
+        # Find where we initialize the chart (within 50 lines, around line 1638)
+        dom_line = line_start(data, dom)
+        chart = data.find(CHART_MARKER, dom_line, skip_lines(data, dom_line, 50))
+        if chart != -1:
+            # Add date initialization BEFORE chart initialization
+            chart_line = line_start(data, chart)
+            edits.append((chart_line, chart_line, DATE_INIT_CODE))
+            print(f"Added date initialization at line {line_number(data, chart_line)}")
+
+    # Also find and fix the loadCostAnalysisData function to use the stored dates
+    cost_fn = data.find(COST_FN_MARKER)
+    if cost_fn != -1:
+        # Look for where it gets the dates (within 20 lines, around line 2175-2176)
+        cost_line = line_start(data, cost_fn)
+        start_expr = data.find(START_DATE_EXPR, cost_line, skip_lines(data, cost_line, 20))
+        if start_expr != -1:
+            # Change to use dashboardData if available
+            start_line = line_start(data, start_expr)
+            end_line = line_end(data, start_expr)
+            edits.append((start_line, end_line, data[start_line:end_line].replace(
+                START_DATE_EXPR, b"dashboardData.startDate || " + START_DATE_EXPR)))
+            next_end = line_end(data, end_line)
+            edits.append((end_line, next_end, data[end_line:next_end].replace(
+                END_DATE_EXPR, b"dashboardData.endDate || " + END_DATE_EXPR)))
+            print(f"Fixed loadCostAnalysisData date handling at line {line_number(data, start_line)}")
+
+    return sorted(edits, key=lambda edit: (edit[0], edit[1]))
+
+
+# Sibling temp file (same filesystem, so os.replace is an atomic rename)
+dest = tempfile.NamedTemporaryFile('wb', buffering=IO_BUFFER_SIZE, delete=False, dir='.',
+                                   prefix='manager.html.', suffix='.tmp')
+try:
+    with open('manager.html', 'rb') as src, dest:
+        # mmap cannot map an empty file; an empty page has nothing to patch
+        size = os.fstat(src.fileno()).st_size
+        data = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        # Copy the untouched stretches straight from the mapping around each edit
+        pos = 0
+        for start, end, replacement in find_edits(data):
+            dest.write(data[pos:start])
+            dest.write(replacement)
+            pos = end
+        dest.write(data[pos:])
+        if size:
+            data.close()
+
+        # Make the new page durable before it replaces the old one
+        dest.flush()
+        os.fsync(dest.fileno())
+
+    # Keep the original permissions, then swap the fixed copy in atomically
+    shutil.copymode('manager.html', dest.name)
+    os.replace(dest.name, 'manager.html')
+except BaseException:
+    # Never leave a half-written temp file behind; manager.html is untouched
+    os.unlink(dest.name)
+    raise
 
 print("Done! Date initialization added to manager.html")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Apply all manager.html date/dashboard fixes in one pass:
+read the file once, run every patch on the in-memory text, write once.
+"""
+
+from add_setDateRange import apply_setDateRange
+from add_applyDateFilter import apply_applyDateFilter
+from fix_dashboard_date_usage import fix_date_usage
+from fix_dashboard_issues import fix_dashboard_issues
+
+PATCHES = [
+    apply_setDateRange,
+    apply_applyDateFilter,
+    fix_date_usage,
+    fix_dashboard_issues,
+]
+
+
+def main():
+    with open('manager.html', 'r') as f:
+        content = f.read()
+
+    for patch in PATCHES:
+        content = patch(content)
+
+    with open('manager.html', 'w') as f:
+        f.write(content)
+
+    print("Patched manager.html")
+
+
+if __name__ == "__main__":
+    main()